@@ -6,104 +6,227 @@
 ##
 
 # main.py
+from profiler import startup_timer, frame_profiler, allocation_counter
 import pygame
+import argparse
 import sys
-from game_states import MenuState, GameState, OptionsState, VictoryState
+import time
+from game_states import MenuState, GameState, OptionsState, VictoryState, LoadingState
 from constants import *
+from assets import AssetLoader
+from controls import Controls, RecordingControls, ReplayControls, EventDispatcher
+from hud import ProfilerHud
+from audio import audio_manager
+from levels import add_level_arguments
 
 class Game:
-    def __init__(self):
+    def __init__(self, fullscreen=True, controls=None, rooms=None, seed=0):
+        startup_timer.mark('imports')
         if not pygame.get_init():
             pygame.init()
         if not pygame.mixer.get_init():
             pygame.mixer.init()
+        startup_timer.mark('pygame.init')
         
-        self.fullscreen = True
-        self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        self.fullscreen = fullscreen
+        # Boucle générée de rooms salles au lieu du niveau du fichier, lue par GameState
+        self.rooms = rooms
+        self.seed = seed
+        self.set_display_mode()
         pygame.display.set_caption("Loop Escape")
+        startup_timer.mark('display')
         
         self.clock = pygame.time.Clock()
         self.running = True
+        # Entrées, horloge et fin du chargement passent par controls pour pouvoir être rejouées
+        self.controls = controls or Controls()
+        self.loader = AssetLoader()
+        self.assets_ready = False
+        self.hud = ProfilerHud()
+        # Seul endroit où la file d'événements est vidée, une fois par image
+        self.events = EventDispatcher()
+        self.events.subscribe(pygame.QUIT, self.on_quit)
+        self.events.subscribe(pygame.KEYDOWN, self.on_key_down)
         
-        # États du jeu
+        # États du jeu, l'état 'game' est créé une fois ses ressources chargées
         self.states = {
             'menu': MenuState(self),
-            'game': GameState(self),
+            'loading': LoadingState(self),
             'options': OptionsState(self),
             'victory': VictoryState(self)
         }
         self.current_state = self.states['menu']
+        startup_timer.mark('menu states')
         
-        # Configuration de la musique
-        self.menu_music_loaded = False
-        self.game_music_loaded = False
-        self.load_menu_music()
+        # Musiques lues en flux, effets courts décodés une fois
+        audio_manager.init()
+        audio_manager.play_music('menu')
+        startup_timer.mark('menu music')
+        
+    def load_game_state(self):
+        if 'game' not in self.states:
+            self.states['game'] = GameState(self)
+            startup_timer.mark('game assets')
+        return self.states['game']
+        
+    def set_display_mode(self):
+        # Les états dessinent dans self.screen à la résolution interne (SCREEN_WIDTH x SCREEN_HEIGHT)
+        self.canvas = None
+        internal_size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        if self.fullscreen and internal_size != (DISPLAY_WIDTH, DISPLAY_HEIGHT):
+            try:
+                self.window = pygame.display.set_mode(internal_size, pygame.FULLSCREEN | pygame.SCALED)
+            except pygame.error:
+                # Pas de mise à l'échelle matérielle : tampon interne agrandi une fois par image
+                self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+                self.canvas = pygame.Surface(internal_size).convert()
+        elif self.fullscreen:
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.window = pygame.display.set_mode(internal_size)
+        self.screen = self.canvas or self.window
+        # Rectangles et images des boutons sont liés au mode d'affichage : recalculés à chaque changement
+        for state in getattr(self, 'states', {}).values():
+            if hasattr(state, 'menu'):
+                state.menu.layout()
         
-    def load_menu_music(self):
-        try:
-            pygame.mixer.music.load('assets/music/menu.mp3')
-            pygame.mixer.music.set_volume(0.2)
-            pygame.mixer.music.play(-1)
-            self.menu_music_loaded = True
-            self.game_music_loaded = False
-        except:
-            print("Erreur: Impossible de charger la musique du menu")
-            
-    def load_game_music(self):
-        try:
-            pygame.mixer.music.load('assets/music/ambient.mp3')
-            pygame.mixer.music.set_volume(0.5)
-            pygame.mixer.music.play(-1)
-            self.menu_music_loaded = False
-            self.game_music_loaded = True
-        except:
-            print("Erreur: Impossible de charger la musique du jeu")
-            
     def toggle_fullscreen(self):
         self.fullscreen = not self.fullscreen
-        if self.fullscreen:
-            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-        else:
-            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.set_display_mode()
+        
+    def get_pressed_keys(self):
+        # Point d'entrée unique de l'état du clavier, échantillonné une fois par image
+        return self.controls.keys
+        
+    def window_to_screen(self, pos):
+        window_width, window_height = self.window.get_size()
+        return (pos[0] * SCREEN_WIDTH // window_width, pos[1] * SCREEN_HEIGHT // window_height)
 
     def run(self):
+        # Simulation à pas fixe, rendu à la cadence de l'écran (MAX_FPS = 0 : sans limite)
+        accumulator = 0.0
         while self.running:
+            frame_time = self.controls.tick(self.clock, MAX_FPS)
+            frame_profiler.begin_frame()
+            accumulator += min(frame_time, MAX_FRAME_TIME)
+            self.assets_ready = self.controls.sync_assets(self.loader)
+            start = time.perf_counter()
             self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(60)
+            frame_profiler.record('events', start, time.perf_counter())
+            while accumulator >= SIMULATION_STEP:
+                start = time.perf_counter()
+                self.update(SIMULATION_STEP)
+                frame_profiler.record('update', start, time.perf_counter())
+                accumulator -= SIMULATION_STEP
+            self.draw(accumulator / SIMULATION_STEP)
+            audio_manager.update()
+            allocation_counter.check(self.current_state)
+            frame_profiler.end_frame()
+            if not self.loader.started:
+                # Les ressources du jeu arrivent pendant que le menu est affiché
+                startup_timer.mark('first menu frame')
+                self.loader.start()
+            self.controls.end_frame()
+        self.controls.close()
+        frame_profiler.stop_trace()
             
     def handle_events(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_F11:
-                    self.toggle_fullscreen()
-                elif event.key == pygame.K_ESCAPE and self.current_state == self.states['game']:
-                    self.change_state('menu')
-            self.current_state.handle_event(event)
+        for event in self.controls.get_events(self.window_to_screen if self.canvas else None):
+            self.events.dispatch(event, self.current_state.handle_event)
+            
+    def on_quit(self, event):
+        self.running = False
+        return True
+        
+    def on_key_down(self, event):
+        # Touches globales, consommées avant d'atteindre l'état courant
+        if event.key == pygame.K_F11:
+            self.toggle_fullscreen()
+        elif event.key == pygame.K_F3:
+            frame_profiler.toggle_hud()
+            if hasattr(self.current_state, 'renderer'):
+                # Le HUD masqué doit disparaître de l'écran au prochain rendu partiel
+                self.current_state.renderer.invalidate()
+        elif event.key == pygame.K_ESCAPE and self.current_state is self.states.get('game'):
+            self.change_state('menu')
+        else:
+            return False
+        return True
                 
-    def update(self):
-        self.current_state.update()
+    def update(self, dt):
+        self.loader.poll()
+        if self.assets_ready and 'game' not in self.states:
+            self.load_game_state()
+            startup_timer.report()
+        self.current_state.update(dt)
+        
+    def draw(self, alpha=1.0):
+        start = time.perf_counter()
+        dirty_rects = self.current_state.draw(self.screen, alpha)
+        if frame_profiler.hud_visible:
+            hud_rect = self.hud.draw(self.screen)
+            if dirty_rects is not None:
+                dirty_rects.append(hud_rect)
+        present_start = time.perf_counter()
+        frame_profiler.record('draw', start, present_start)
+        self.present(dirty_rects)
+        frame_profiler.record('present', present_start, time.perf_counter())
         
-    def draw(self):
-        self.current_state.draw(self.screen)
-        pygame.display.flip()
+    def present(self, dirty_rects):
+        if self.canvas:
+            pygame.transform.scale(self.canvas, self.window.get_size(), self.window)
+            pygame.display.flip()
+        elif dirty_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty_rects)
         
     def change_state(self, state_name):
-        # Changer la musique selon l'état
-        if state_name == 'game' and not self.game_music_loaded:
-            self.load_game_music()
-        elif (state_name == 'menu' or state_name == 'options') and not self.menu_music_loaded:
-            self.load_menu_music()
+        if state_name == 'game' and not self.assets_ready:
+            self.loader.start()
+            self.current_state = self.states['loading']
+            return
             
+        # Changer la musique selon l'état, en fondu
         if state_name == 'game':
-            self.states['game'] = GameState(self)
+            audio_manager.play_music('game')
+        elif state_name == 'menu' or state_name == 'options':
+            if self.current_state is self.states.get('game'):
+                # Quitter la partie coupe la cinématique en cours et sa bande son
+                self.current_state.cinematic_manager.reset()
+            audio_manager.play_music('menu')
+            
+        if state_name == 'game':
+            self.load_game_state().reset()
         self.current_state = self.states[state_name]
         
 if __name__ == '__main__':
-    game = Game()
+    parser = argparse.ArgumentParser(description="Loop Escape")
+    parser.add_argument('--record', metavar='FICHIER', help="enregistre les entrées de la partie")
+    parser.add_argument('--replay', metavar='FICHIER', help="rejoue un enregistrement en temps réel")
+    parser.add_argument('--startup-report', action='store_true', help="affiche le détail du démarrage")
+    parser.add_argument('--trace', metavar='FICHIER', help="enregistre la session au format Chrome trace")
+    parser.add_argument('--check-allocations', action='store_true',
+                        help="vérifie qu'aucun bloc n'est alloué pendant les images stables")
+    add_level_arguments(parser)
+    args = parser.parse_args()
+    startup_timer.enabled = args.startup_report
+    allocation_counter.enabled = args.check_allocations and __debug__
+    if args.trace:
+        frame_profiler.start_trace(args.trace)
+    controls = None
+    rooms, seed = args.rooms, args.seed
+    if args.record:
+        controls = RecordingControls(args.record, (SCREEN_WIDTH, SCREEN_HEIGHT), SIMULATION_RATE, rooms, seed)
+    elif args.replay:
+        # Le niveau vient de l'enregistrement, la résolution doit être celle de la partie enregistrée
+        try:
+            controls = ReplayControls(args.replay, realtime=True)
+            controls.check_format((SCREEN_WIDTH, SCREEN_HEIGHT), SIMULATION_RATE)
+        except ValueError as error:
+            parser.error(str(error))
+        rooms, seed = controls.rooms, controls.seed
+    game = Game(controls=controls, rooms=rooms, seed=seed)
     game.run()
     pygame.quit()
     sys.exit()
@@ -0,0 +1,212 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## assets
+##
+
+import pygame
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from constants import *
+from inversion import invert_surface
+
+ASSET_CACHE_BUDGET = 256 * 1024 * 1024
+SOUND_CACHE_BUDGET = 32 * 1024 * 1024
+ASSET_LOADER_WORKERS = 4
+SOUND_EXTENSIONS = ('.wav', '.ogg', '.mp3')
+
+# (chemin, taille, conversion, priorité) : les ressources 'hot' doivent être
+# en mémoire avant de lancer la partie, les 'cold' arrivent en arrière-plan
+ASSET_MANIFEST = [
+    ('assets/image/walk_animation.png', None, 'alpha', 'hot'),
+    ('assets/image/background.jpg', (SCREEN_WIDTH, SCREEN_HEIGHT), 'opaque', 'hot'),
+    ('assets/image/key.png', (40, 40), 'alpha', 'hot'),
+    ('assets/image/switch_on.png', (60, 60), 'alpha', 'hot'),
+    ('assets/image/switch_off.png', (60, 60), 'alpha', 'hot'),
+    ('assets/image/power.png', (100, 100), 'alpha', 'hot'),
+    ('assets/image/e.png', (30, 30), 'alpha', 'hot'),
+    ('assets/sounds/intro.wav', None, None, 'hot'),
+    ('assets/sounds/first_key.wav', None, None, 'cold'),
+    ('assets/sounds/power.wav', None, None, 'cold'),
+    ('assets/sounds/ending.wav', None, None, 'cold'),
+    ('assets/sounds/footstep.mp3', None, None, 'cold'),
+]
+
+# Images dont la version inversée est calculée dès leur chargement
+INVERTED_ASSETS = [
+    ('assets/image/background.jpg', (SCREEN_WIDTH, SCREEN_HEIGHT), 'opaque'),
+]
+
+class AssetCache:
+    def __init__(self, budget=ASSET_CACHE_BUDGET, sound_budget=SOUND_CACHE_BUDGET):
+        self.budget = budget
+        self.sound_budget = sound_budget
+        self.surfaces = OrderedDict()
+        # Toutes les surfaces encore référencées, y compris celles évincées du budget
+        self.live_surfaces = weakref.WeakValueDictionary()
+        self.sounds = OrderedDict()
+        self.memory_used = 0
+        self.sound_memory_used = 0
+
+    def get_image(self, path, size=None, convert=None):
+        # Une seule surface par (chemin, taille, conversion) pour tout le processus
+        key = (path, tuple(size) if size else None, convert)
+        surface = self.lookup(key)
+        if surface is not None:
+            return surface
+        # L'original non mis à l'échelle n'est gardé que s'il est demandé lui-même
+        original = self.lookup((path, None, convert))
+        if original is None:
+            original = self.convert_surface(pygame.image.load(path), convert)
+        surface = pygame.transform.scale(original, key[1]) if size else original
+        self.store(key, surface)
+        return surface
+
+    def get_inverted(self, path, size=None, convert=None):
+        # Version négative dérivée de l'image, mise en cache à côté de l'originale
+        key = (path, tuple(size) if size else None, convert, 'inverted')
+        surface = self.lookup(key)
+        if surface is not None:
+            return surface
+        surface = invert_surface(self.get_image(path, size, convert))
+        self.store(key, surface)
+        return surface
+        
+    def store_image(self, path, size, convert, surface):
+        self.store((path, tuple(size) if size else None, convert), self.convert_surface(surface, convert))
+
+    def convert_surface(self, surface, convert):
+        if convert == 'alpha':
+            return surface.convert_alpha()
+        if convert == 'opaque':
+            return surface.convert()
+        return surface
+
+    def get_sound(self, path):
+        # Échantillons décodés une fois, gardés dans la limite de sound_budget
+        sound = self.sounds.get(path)
+        if sound is not None:
+            self.sounds.move_to_end(path)
+            return sound
+        sound = pygame.mixer.Sound(path)
+        self.store_sound(path, sound)
+        return sound
+
+    def store_sound(self, path, sound):
+        previous = self.sounds.pop(path, None)
+        if previous is not None:
+            self.sound_memory_used -= self.sound_size(previous)
+        self.sounds[path] = sound
+        self.sound_memory_used += self.sound_size(sound)
+        # Un son en cours de lecture reste référencé par son canal, l'évincer ne le coupe pas
+        while self.sound_memory_used > self.sound_budget and len(self.sounds) > 1:
+            _, evicted = self.sounds.popitem(last=False)
+            self.sound_memory_used -= self.sound_size(evicted)
+
+    def sound_size(self, sound):
+        # Taille du PCM décodé au format du mixer, sans copier le tampon comme get_raw()
+        frequency, sample_format, channels = pygame.mixer.get_init() or (44100, -16, 2)
+        return int(sound.get_length() * frequency) * channels * (abs(sample_format) // 8)
+
+    def lookup(self, key):
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        # Évincée mais encore tenue par une salle : reprise plutôt que rechargée en double
+        surface = self.live_surfaces.get(key)
+        if surface is not None:
+            self.store(key, surface)
+        return surface
+
+    def store(self, key, surface):
+        self.surfaces[key] = surface
+        self.live_surfaces[key] = surface
+        self.memory_used += self.surface_size(surface)
+        self.evict()
+
+    def evict(self):
+        # Les surfaces les moins récemment utilisées partent en premier
+        while self.memory_used > self.budget and len(self.surfaces) > 1:
+            _, surface = self.surfaces.popitem(last=False)
+            self.memory_used -= self.surface_size(surface)
+
+    def surface_size(self, surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def clear(self):
+        self.surfaces.clear()
+        self.live_surfaces.clear()
+        self.sounds.clear()
+        self.memory_used = 0
+        self.sound_memory_used = 0
+
+asset_cache = AssetCache()
+
+class AssetLoader:
+    def __init__(self, manifest=ASSET_MANIFEST, cache=asset_cache, workers=ASSET_LOADER_WORKERS):
+        self.manifest = manifest
+        self.cache = cache
+        self.workers = workers
+        self.started = False
+        self.pending = []
+        self.hot_total = sum(1 for entry in manifest if entry[3] == 'hot')
+        self.hot_loaded = 0
+        self.errors = []
+
+    def start(self):
+        if self.started:
+            return
+        self.started = True
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        # Les ressources indispensables passent en premier
+        for entry in sorted(self.manifest, key=lambda entry: entry[3] != 'hot'):
+            self.pending.append((entry, executor.submit(self.decode, entry)))
+        executor.shutdown(wait=False)
+
+    def decode(self, entry):
+        # Exécuté sur un thread de travail : décodage et mise à l'échelle uniquement
+        path, size, convert, priority = entry
+        if path.endswith(SOUND_EXTENSIONS):
+            return pygame.mixer.Sound(path)
+        surface = pygame.image.load(path)
+        if size:
+            surface = pygame.transform.scale(surface, size)
+        return surface
+
+    def poll(self):
+        # Conversion au format d'affichage et mise en cache sur le thread principal
+        still_pending = []
+        for entry, future in self.pending:
+            if not future.done():
+                still_pending.append((entry, future))
+                continue
+            path, size, convert, priority = entry
+            try:
+                asset = future.result()
+            except (pygame.error, OSError) as e:
+                print(f"Erreur: Impossible de charger {path}: {e}")
+                self.errors.append(path)
+            else:
+                if isinstance(asset, pygame.mixer.Sound):
+                    self.cache.store_sound(path, asset)
+                else:
+                    self.cache.store_image(path, size, convert, asset)
+                    if (path, size, convert) in INVERTED_ASSETS:
+                        self.cache.get_inverted(path, size, convert)
+            if priority == 'hot':
+                self.hot_loaded += 1
+        self.pending = still_pending
+
+    def progress(self):
+        if not self.hot_total:
+            return 1.0
+        return self.hot_loaded / self.hot_total
+
+    def hot_ready(self):
+        return self.started and self.hot_loaded >= self.hot_total
+
+    def finished(self):
+        return self.started and not self.pending
@@ -0,0 +1,78 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## atlas
+##
+
+import pygame
+from constants import *
+from assets import asset_cache
+
+ATLAS_PAGE_SIZE = (2048, 2048)
+ATLAS_PADDING = 1
+
+class AtlasPage:
+    # Rangement par étagères : les sprites sont posés de gauche à droite, une nouvelle
+    # étagère commence sous la plus haute image de la précédente
+    def __init__(self, size):
+        self.surface = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        self.surface.fill((0, 0, 0, 0))
+        self.shelf_x = 0
+        self.shelf_y = 0
+        self.shelf_height = 0
+
+    def place(self, width, height):
+        page_width, page_height = self.surface.get_size()
+        if self.shelf_x + width > page_width:
+            self.shelf_x = 0
+            self.shelf_y += self.shelf_height + ATLAS_PADDING
+            self.shelf_height = 0
+        if width > page_width or self.shelf_y + height > page_height:
+            return None
+        rect = pygame.Rect(self.shelf_x, self.shelf_y, width, height)
+        self.shelf_x += width + ATLAS_PADDING
+        self.shelf_height = max(self.shelf_height, height)
+        return rect
+
+class SpriteAtlas:
+    def __init__(self, page_size=ATLAS_PAGE_SIZE):
+        self.page_size = page_size
+        self.pages = []
+        self.sprites = {}
+        self.rects = {}
+
+    def add(self, name, surface):
+        # Copie le sprite dans une page et renvoie une sous-surface nommée de cette page
+        sprite = self.sprites.get(name)
+        if sprite is not None:
+            return sprite
+        width, height = surface.get_size()
+        page_size = (max(self.page_size[0], width), max(self.page_size[1], height))
+        rect = self.pages[-1].place(width, height) if self.pages else None
+        if rect is None:
+            self.pages.append(AtlasPage(page_size))
+            rect = self.pages[-1].place(width, height)
+        page = self.pages[-1].surface
+        # MAX sur une page transparente : copie exacte, alpha compris, sans mélange
+        page.blit(surface, rect, special_flags=pygame.BLEND_RGBA_MAX)
+        sprite = page.subsurface(rect)
+        self.sprites[name] = sprite
+        self.rects[name] = (len(self.pages) - 1, rect)
+        return sprite
+
+    def get(self, name):
+        return self.sprites.get(name)
+
+    def load(self, name, path, size=None):
+        sprite = self.sprites.get(name)
+        if sprite is None:
+            sprite = self.add(name, asset_cache.get_image(path, size, 'alpha'))
+        return sprite
+
+    def clear(self):
+        self.pages.clear()
+        self.sprites.clear()
+        self.rects.clear()
+
+sprite_atlas = SpriteAtlas()
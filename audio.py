@@ -0,0 +1,135 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## audio
+##
+
+import pygame
+from constants import *
+from assets import asset_cache
+
+MUSIC_FADE_MS = 800
+SFX_CHANNELS = 8
+# Canal 0 réservé aux bandes son des cinématiques : les effets ne le prennent jamais
+CINEMATIC_CHANNEL = 0
+
+# nom : (fichier, volume) ; les musiques sont lues en flux, jamais décodées en entier
+MUSIC_TRACKS = {
+    'menu': ('assets/music/menu.mp3', 0.2),
+    'game': ('assets/music/ambient.mp3', 0.5),
+}
+
+# nom : (fichier, volume) ; les effets courts sont décodés une fois et gardés dans asset_cache
+SOUND_EFFECTS = {
+    'footstep': ('assets/sounds/footstep.mp3', 0.4),
+}
+
+class AudioManager:
+    def __init__(self):
+        self.initialized = False
+        self.music_enabled = True
+        self.music_paused = False
+        self.current_track = None
+        self.next_track = None
+        self.cinematic_channel = None
+        self.sfx_channels = []
+        self.next_sfx_channel = 0
+
+    def init(self):
+        # Appelée une fois le mixer ouvert ; sans périphérique audio tout devient sans effet
+        if self.initialized or not pygame.mixer.get_init():
+            return self.initialized
+        pygame.mixer.set_num_channels(SFX_CHANNELS + 1)
+        pygame.mixer.set_reserved(1)
+        self.cinematic_channel = pygame.mixer.Channel(CINEMATIC_CHANNEL)
+        self.sfx_channels = [pygame.mixer.Channel(index) for index in range(1, SFX_CHANNELS + 1)]
+        self.initialized = True
+        return True
+
+    def play_music(self, name):
+        # Fondu de sortie de la piste en cours, la suivante démarre en fondu dans update()
+        if not self.init() or name == self.next_track:
+            return
+        if name == self.current_track and self.next_track is None:
+            return
+        self.next_track = name
+        if self.current_track is not None and pygame.mixer.music.get_busy():
+            pygame.mixer.music.fadeout(MUSIC_FADE_MS)
+        else:
+            self.start_next_track()
+
+    def start_next_track(self):
+        name, self.next_track = self.next_track, None
+        path, volume = MUSIC_TRACKS[name]
+        self.current_track = name
+        try:
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.set_volume(volume)
+            pygame.mixer.music.play(-1, fade_ms=MUSIC_FADE_MS)
+        except pygame.error:
+            print(f"Erreur: Impossible de charger la musique {path}")
+            return
+        if self.music_paused or not self.music_enabled:
+            pygame.mixer.music.pause()
+
+    def update(self):
+        # get_busy() est faux pendant une pause : on n'attend la fin du fondu que si la musique joue
+        if self.next_track is not None and not self.music_paused and not pygame.mixer.music.get_busy():
+            self.start_next_track()
+
+    def pause_music(self):
+        self.music_paused = True
+        if self.initialized:
+            pygame.mixer.music.pause()
+
+    def resume_music(self):
+        self.music_paused = False
+        if self.initialized and self.music_enabled:
+            pygame.mixer.music.unpause()
+
+    def set_music_enabled(self, enabled):
+        self.music_enabled = enabled
+        if not self.initialized:
+            return
+        if enabled and not self.music_paused:
+            pygame.mixer.music.unpause()
+        else:
+            pygame.mixer.music.pause()
+
+    def play_sound(self, name):
+        # Effet court sur un canal libre du groupe, sinon sur le suivant à tour de rôle
+        if not self.init():
+            return None
+        path, volume = SOUND_EFFECTS[name]
+        try:
+            sound = asset_cache.get_sound(path)
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"Erreur: Impossible de charger le son {path}: {e}")
+            return None
+        channel = self.find_sfx_channel()
+        channel.set_volume(volume)
+        channel.play(sound)
+        return channel
+
+    def find_sfx_channel(self):
+        # find_channel(True) peut voler le canal réservé : le groupe des effets est parcouru ici
+        for channel in self.sfx_channels:
+            if not channel.get_busy():
+                return channel
+        channel = self.sfx_channels[self.next_sfx_channel]
+        self.next_sfx_channel = (self.next_sfx_channel + 1) % len(self.sfx_channels)
+        return channel
+
+    def play_cinematic_sound(self, path):
+        if not self.init():
+            return None
+        sound = asset_cache.get_sound(path)
+        self.cinematic_channel.play(sound)
+        return sound
+
+    def stop_cinematic_sound(self):
+        if self.initialized:
+            self.cinematic_channel.stop()
+
+audio_manager = AudioManager()
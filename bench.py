@@ -0,0 +1,243 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## bench
+##
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import pygame
+from controls import Controls, ReplayControls, read_header
+from levels import add_level_arguments
+
+# Main et constants lisent les pilotes et LOOP_RESOLUTION à l'import :
+# ils ne sont importés par main() qu'une fois l'environnement fixé
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Banc de mesure du jeu sans affichage")
+    parser.add_argument('--resolution', default='1920x1080', help="résolution interne, ex. 1280x720")
+    parser.add_argument('--frames', type=int, default=300, help="images mesurées par scénario")
+    parser.add_argument('--scenario', action='append', help="scénario à lancer (tous par défaut)")
+    parser.add_argument('--output', default='bench_results.json', help="fichier JSON des résultats")
+    parser.add_argument('--replay', help="rejoue un enregistrement (Main.py --record) au lieu des scénarios")
+    add_level_arguments(parser)
+    return parser.parse_args(argv)
+
+def configure_environment(args):
+    # Pilotes factices et résolution fixés avant l'initialisation de l'affichage
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    os.environ['LOOP_RESOLUTION'] = args.resolution
+    if args.replay:
+        # Résolution de la partie enregistrée, dont dépendent positions et vitesses
+        os.environ['LOOP_RESOLUTION'] = '%dx%d' % read_header(args.replay)[0]
+
+class ScriptedKeys:
+    # Remplace pygame.key.get_pressed() : seules les touches maintenues par le script sont enfoncées
+    __slots__ = ('held',)
+
+    def __init__(self):
+        self.held = set()
+
+    def __getitem__(self, key):
+        return key in self.held
+
+class ScriptedControls(Controls):
+    # Les touches viennent du script et non du clavier ; un pas de simulation par image
+    def __init__(self, simulation_step):
+        super().__init__()
+        self.keys = ScriptedKeys()
+        self.simulation_step = simulation_step
+
+    def get_events(self, remap=None):
+        return pygame.event.get()
+
+def step(game):
+    game.assets_ready = game.controls.sync_assets(game.loader)
+    game.handle_events()
+    game.update(game.controls.simulation_step)
+    game.draw()
+
+def press(key):
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode='', scancode=0))
+
+def start_game(game):
+    game.loader.start()
+    while not game.loader.hot_ready():
+        game.loader.poll()
+        time.sleep(0.005)
+    game.assets_ready = game.controls.sync_assets(game.loader)
+    game.change_state('game')
+    return game.current_state
+
+def skip_cinematic(game):
+    state = game.current_state
+    while state.cinematic_manager.is_playing():
+        press(pygame.K_SPACE)
+        step(game)
+
+def setup_menu(game):
+    game.controls.keys.held.clear()
+    game.change_state('menu')
+
+def setup_game(game):
+    setup_menu(game)
+    start_game(game)
+    skip_cinematic(game)
+
+def setup_inverted(game):
+    setup_game(game)
+    game.current_state.player.has_inversion_power = True
+    press(pygame.K_i)
+    step(game)
+
+def setup_cinematic(game):
+    setup_menu(game)
+    start_game(game)
+
+def setup_victory(game):
+    setup_menu(game)
+    game.change_state('victory')
+
+def script_menu(game, frame):
+    if frame % 30 == 0:
+        press(pygame.K_DOWN)
+
+def script_walk(game, frame):
+    # Allers-retours au milieu de la salle avec un saut régulier, sans atteindre les portes
+    game.controls.keys.held.clear()
+    game.controls.keys.held.add(pygame.K_RIGHT if (frame // 40) % 2 == 0 else pygame.K_LEFT)
+    if frame % 90 == 45:
+        game.controls.keys.held.add(pygame.K_SPACE)
+
+def script_idle(game, frame):
+    pass
+
+# nom : (préparation, script d'entrées par image, cadencé en temps réel)
+# Les cinématiques suivent l'horloge murale : sans cadence, aucune image vidéo n'arrive à temps
+SCENARIOS = {
+    'menu': (setup_menu, script_menu, False),
+    'game': (setup_game, script_walk, False),
+    'game_inverted': (setup_inverted, script_walk, False),
+    'cinematic': (setup_cinematic, script_idle, True),
+    'victory': (setup_victory, script_idle, False),
+}
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+def wait_next_frame(game, start, paced):
+    if paced:
+        time.sleep(max(0, game.controls.simulation_step - (time.perf_counter() - start)))
+
+def measure_times(game, script, frames, paced):
+    frame_times = []
+    for frame in range(frames):
+        script(game, frame)
+        start = time.perf_counter()
+        step(game)
+        frame_times.append(time.perf_counter() - start)
+        wait_next_frame(game, start, paced)
+    return summarize(frame_times)
+
+def summarize(frame_times):
+    frames = len(frame_times)
+    frame_times = sorted(frame_times)
+    return {
+        'mean_ms': round(sum(frame_times) / frames * 1000, 3),
+        'p50_ms': round(percentile(frame_times, 0.50) * 1000, 3),
+        'p90_ms': round(percentile(frame_times, 0.90) * 1000, 3),
+        'p99_ms': round(percentile(frame_times, 0.99) * 1000, 3),
+        'max_ms': round(frame_times[-1] * 1000, 3),
+    }
+
+def measure_memory(game, script, frames, paced):
+    # Passe séparée : tracemalloc ralentit trop les images pour mesurer les temps
+    tracemalloc.start()
+    start_memory, _ = tracemalloc.get_traced_memory()
+    start_blocks = sys.getallocatedblocks()
+    for frame in range(frames):
+        script(game, frame)
+        start = time.perf_counter()
+        step(game)
+        wait_next_frame(game, start, paced)
+    end_blocks = sys.getallocatedblocks()
+    end_memory, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'net_blocks': end_blocks - start_blocks,
+        'net_bytes': end_memory - start_memory,
+        'peak_bytes': peak_memory - start_memory,
+    }
+
+def run_scenario(game, name, frames):
+    setup, script, paced = SCENARIOS[name]
+    setup(game)
+    result = {'state': type(game.current_state).__name__}
+    result.update(measure_times(game, script, frames, paced))
+    setup(game)
+    result.update(measure_memory(game, script, frames, paced))
+    return result
+
+def max_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_replay(game_class, path, resolution, simulation_rate):
+    # Même boucle que le jeu, sans attente entre les images, sur le niveau enregistré
+    controls = ReplayControls(path)
+    controls.check_format(resolution, simulation_rate)
+    game = game_class(fullscreen=False, controls=controls, rooms=controls.rooms, seed=controls.seed)
+    game.run()
+    result = {'frames': len(controls.frame_times)}
+    result.update(summarize(controls.frame_times))
+    result['frame_times_ms'] = [round(frame_time * 1000, 3) for frame_time in controls.frame_times]
+    print(f"replay         p50 {result['p50_ms']:8.3f} ms  p99 {result['p99_ms']:8.3f} ms  "
+          f"{result['frames']} images")
+    return result
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_environment(args)
+    from Main import Game
+    from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SIMULATION_RATE, SIMULATION_STEP
+    if args.replay:
+        results = {'resolution': [SCREEN_WIDTH, SCREEN_HEIGHT],
+                   'replay': run_replay(Game, args.replay, (SCREEN_WIDTH, SCREEN_HEIGHT), SIMULATION_RATE),
+                   'max_rss_kb': max_rss_kb()}
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=4)
+        pygame.quit()
+        return
+    game = Game(fullscreen=False, controls=ScriptedControls(SIMULATION_STEP), rooms=args.rooms, seed=args.seed)
+    results = {
+        'resolution': [SCREEN_WIDTH, SCREEN_HEIGHT],
+        'frames': args.frames,
+        'python': sys.version.split()[0],
+        'pygame': pygame.version.ver,
+        'scenarios': {},
+    }
+    for name in args.scenario or SCENARIOS:
+        if name not in SCENARIOS:
+            print(f"Erreur: Scénario inconnu {name}")
+            continue
+        results['scenarios'][name] = run_scenario(game, name, args.frames)
+        scenario = results['scenarios'][name]
+        print(f"{name:<14} p50 {scenario['p50_ms']:8.3f} ms  p99 {scenario['p99_ms']:8.3f} ms  "
+              f"blocs {scenario['net_blocks']:+d}  pic {scenario['peak_bytes'] // 1024} Ko")
+    results['max_rss_kb'] = max_rss_kb()
+    with open(args.output, 'w') as output_file:
+        json.dump(results, output_file, indent=4)
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
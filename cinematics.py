@@ -1,64 +1,305 @@
 import pygame
-import cv2
-import numpy as np
+import atexit
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import weakref
 from constants import *
+from profiler import frame_profiler, profiled
+from audio import audio_manager
+from fonts import text_cache
+
+FRAME_BUFFER_SIZE = 8
+DEFAULT_VIDEO_FPS = 30
+CINEMATIC_CACHE_DIR = 'cache/cinematics'
+CACHE_MAGIC = b'LOOPCIN2'
+# magique, largeur, hauteur, fps, nombre d'images, masques rouge, vert et bleu des pixels 32 bits
+CACHE_HEADER = struct.Struct('<8sIIdIIII')
+
+cv2 = None
+
+def load_cv2():
+    # OpenCV n'est importé qu'à la première cinématique, pas au démarrage du menu
+    global cv2
+    if cv2 is None:
+        import cv2
+
+def display_masks():
+    # Masques rouge, vert et bleu de l'écran ; le cache n'existe que pour les écrans 32 bits
+    info = pygame.display.Info()
+    if info.bytesize != 4:
+        raise ValueError(f"format d'affichage {info.bitsize} bits non pris en charge par le cache")
+    return tuple(info.masks[:3])
+
+def mask_shift(mask):
+    return (mask & -mask).bit_length() - 1
+
+def transcode_cinematic(video_path, cache_path, size):
+    # Pixels 32 bits dans l'ordre de l'écran : la lecture n'est qu'une copie, sans conversion au blit
+    load_cv2()
+    import numpy
+    masks = display_masks()
+    shifts = [mask_shift(mask) for mask in masks]
+    video = cv2.VideoCapture(video_path)
+    fps = video.get(cv2.CAP_PROP_FPS) or DEFAULT_VIDEO_FPS
+    temp_path = cache_path + '.tmp'
+    frame_count = 0
+    with open(temp_path, 'wb') as output:
+        output.write(CACHE_HEADER.pack(CACHE_MAGIC, size[0], size[1], fps, 0, *masks))
+        while True:
+            ret, frame = video.read()
+            if not ret:
+                break
+            frame = cv2.resize(frame, size).astype(numpy.uint32)
+            # OpenCV décode en BGR
+            pixels = (frame[..., 2] << shifts[0]) | (frame[..., 1] << shifts[1]) | (frame[..., 0] << shifts[2])
+            output.write(pixels.astype('=u4').tobytes())
+            frame_count += 1
+        output.seek(0)
+        output.write(CACHE_HEADER.pack(CACHE_MAGIC, size[0], size[1], fps, frame_count, *masks))
+    video.release()
+    os.replace(temp_path, cache_path)
+
+class MappedFrames:
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.fps, self.frame_count, *masks = CACHE_HEADER.unpack_from(self.map)
+        self.frame_size = self.width * self.height * 4
+        if magic != CACHE_MAGIC or len(self.map) < CACHE_HEADER.size + self.frame_size * self.frame_count:
+            self.close()
+            raise ValueError(f"cache invalide : {path}")
+        if tuple(masks) != display_masks():
+            self.close()
+            raise ValueError(f"cache transcodé pour un autre format d'affichage : {path}")
+        self.view = memoryview(self.map)
+        # Surface au format de l'écran, remplie par une simple copie à chaque image
+        self.surface = pygame.Surface((self.width, self.height), 0, 32, (*masks, 0))
+
+    def frame(self, index):
+        start = CACHE_HEADER.size + index * self.frame_size
+        self.surface.get_buffer().write(self.view[start:start + self.frame_size])
+        return self.surface
+
+    def close(self):
+        if getattr(self, 'view', None):
+            self.view.release()
+            self.view = None
+        try:
+            self.map.close()
+        except BufferError:
+            pass
+        self.file.close()
+
+class VideoDecoder(threading.Thread):
+    active_decoders = weakref.WeakSet()
+
+    def __init__(self, video, size, fps, clock, buffer_size=FRAME_BUFFER_SIZE):
+        super().__init__(daemon=True)
+        self.video = video
+        self.size = size
+        self.fps = fps
+        self.clock = clock
+        self.frames = queue.Queue(maxsize=buffer_size)
+        self.stopped = threading.Event()
+        self.ended = False
+        self.skipped_frames = 0
+        VideoDecoder.active_decoders.add(self)
+
+    def run(self):
+        # Décodage, conversion et redimensionnement hors de la boucle de rendu
+        index = 0
+        while not self.stopped.is_set():
+            # Image déjà en retard sur l'horloge : on l'avance sans la convertir
+            if (index + 1) / self.fps < self.clock():
+                if not self.video.grab():
+                    break
+                self.skipped_frames += 1
+                index += 1
+                continue
+            start = time.perf_counter()
+            ret, frame = self.video.read()
+            if not ret:
+                break
+            timestamp = self.video.get(cv2.CAP_PROP_POS_MSEC) / 1000 or index / self.fps
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            frame = cv2.resize(frame, self.size)
+            frame_profiler.record('VideoDecoder.decode', start, time.perf_counter())
+            self.push((timestamp, frame))
+            index += 1
+        self.push(None)
+
+    def push(self, frame):
+        while not self.stopped.is_set():
+            try:
+                self.frames.put(frame, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def pop(self):
+        if self.ended:
+            return None
+        try:
+            frame = self.frames.get_nowait()
+        except queue.Empty:
+            return None
+        if frame is None:
+            self.ended = True
+        return frame
+
+    def stop(self):
+        self.stopped.set()
+        if self.is_alive():
+            self.join()
+
+@atexit.register
+def stop_decoders():
+    # Un thread encore dans OpenCV à la fermeture de l'interpréteur fait planter le processus
+    for decoder in list(VideoDecoder.active_decoders):
+        decoder.stop()
 
 class Cinematic:
-    def __init__(self, video_path, sound_path=None):
-        self.video = cv2.VideoCapture(video_path)
+    def __init__(self, video_path, sound_path=None, cache_path=None, clock=pygame.time.get_ticks):
+        self.clock = clock
+        self.video = None
+        self.decoder = None
+        self.frames = None
         self.finished = False
         self.skipped = False
         self.frame_surface = None
+        self.frame_index = None
+        self.next_frame = None
+        self.dropped_frames = 0
+        self.duplicated_frames = 0
+        
+        if cache_path and os.path.exists(cache_path):
+            try:
+                self.frames = MappedFrames(cache_path)
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Erreur de lecture du cache de cinématique : {e}")
+        if not self.frames:
+            load_cv2()
+            self.video = cv2.VideoCapture(video_path)
         
         self.sound = None
         if sound_path:
             try:
-                self.sound = pygame.mixer.Sound(sound_path)
-                self.sound.play()
+                # Canal réservé : les effets sonores ne coupent jamais la bande son
+                self.sound = audio_manager.play_cinematic_sound(sound_path)
             except Exception as e:
                 print(f"Erreur de chargement du son : {e}")
+        self.start_time = self.clock()
         
-        self.width = int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH))
-        self.height = int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if self.frames:
+            self.width = self.frames.width
+            self.height = self.frames.height
+            self.fps = self.frames.fps
+        else:
+            self.width = int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            self.fps = self.video.get(cv2.CAP_PROP_FPS) or DEFAULT_VIDEO_FPS
+            frame_count = self.video.get(cv2.CAP_PROP_FRAME_COUNT)
+            # Fin fixée par l'horloge et non par le thread de décodage : identique en relecture
+            self.duration = frame_count / self.fps if frame_count > 0 else None
+            self.decoder = VideoDecoder(self.video, (SCREEN_WIDTH, SCREEN_HEIGHT), self.fps, self.elapsed)
+            self.decoder.start()
         
-        self.font = pygame.font.Font(None, 36)
-        self.skip_text = self.font.render("Appuyez sur ESPACE pour passer", True, WHITE)
+        self.skip_text = text_cache.render("Appuyez sur ESPACE pour passer", 36, WHITE)
         self.skip_rect = self.skip_text.get_rect(bottomright=(SCREEN_WIDTH - 20, SCREEN_HEIGHT - 20))
         
-    def update(self, events):
-        for event in events:
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                self.skipped = True
-                self.finished = True
-                if self.sound:
-                    self.sound.stop()
-                return
+    def elapsed(self):
+        # Horloge partagée avec la bande son, démarrée en même temps qu'elle
+        return (self.clock() - self.start_time) / 1000
         
-        ret, frame = self.video.read()
-        if ret:
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame = cv2.resize(frame, (SCREEN_WIDTH, SCREEN_HEIGHT))
-            frame = np.rot90(frame)
-            frame = np.flipud(frame)
-            frame = pygame.surfarray.make_surface(frame)
-            self.frame_surface = frame
+    @profiled
+    def update(self):
+        # Appelée une fois par pas de simulation, quel que soit le nombre d'événements reçus
+        if self.finished:
+            return
+        if self.frames:
+            self.update_mapped()
         else:
-            self.finished = True
-            if self.sound:
-                self.sound.stop()
-            self.video.release()
+            self.update_decoded()
+            
+    def update_mapped(self):
+        index = int(self.elapsed() * self.fps)
+        if index >= self.frames.frame_count:
+            self.finish()
+        elif index == self.frame_index:
+            self.duplicated_frames += 1
+        else:
+            if self.frame_index is not None:
+                self.dropped_frames += index - self.frame_index - 1
+            self.frame_index = index
+            self.frame_surface = self.frames.frame(index)
+            
+    def update_decoded(self):
+        # Dernière image dont l'horodatage est atteint ; les précédentes sont sautées
+        now = self.elapsed()
+        if self.duration and now >= self.duration:
+            self.dropped_frames += self.decoder.skipped_frames
+            self.finish()
+            return
+        shown = None
+        while True:
+            if self.next_frame is None:
+                self.next_frame = self.decoder.pop()
+                if self.next_frame is None:
+                    break
+            if self.next_frame[0] > now:
+                break
+            if shown is not None:
+                self.dropped_frames += 1
+            shown = self.next_frame
+            self.next_frame = None
+            
+        if shown is not None:
+            self.frame_surface = pygame.image.frombuffer(shown[1], (SCREEN_WIDTH, SCREEN_HEIGHT), 'RGB')
+        elif self.decoder.ended and self.next_frame is None:
+            self.dropped_frames += self.decoder.skipped_frames
+            self.finish()
+        elif self.frame_surface:
+            self.duplicated_frames += 1
+            
+    def skip(self):
+        self.skipped = True
+        self.finish()
+            
+    def finish(self):
+        self.finished = True
+        if self.sound:
+            audio_manager.stop_cinematic_sound()
+            self.sound = None
+        self.close()
             
+    @profiled
     def draw(self, screen):
         if self.frame_surface:
             screen.blit(self.frame_surface, (0, 0))
             screen.blit(self.skip_text, self.skip_rect)
             
-    def __del__(self):
+    def close(self):
+        if self.frames:
+            self.frame_surface = None
+            self.frames.close()
+            self.frames = None
+        if self.decoder:
+            self.decoder.stop()
+            self.decoder = None
         if self.video:
             self.video.release()
+            self.video = None
+            
+    def __del__(self):
+        self.close()
 
 class CinematicManager:
-    def __init__(self):
+    def __init__(self, cache_dir=CINEMATIC_CACHE_DIR, clock=pygame.time.get_ticks):
+        self.clock = clock
         self.cinematics = {
             'intro': {
                 'video': 'assets/videos/intro.mp4',
@@ -77,27 +318,55 @@ class CinematicManager:
                 'sound': 'assets/sounds/ending.wav'
             }
         }
+        self.cache_dir = cache_dir
         self.current_cinematic = None
         self.played_cinematics = set()
         
+    def cache_path(self, cinematic_name):
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{cinematic_name}_{SCREEN_WIDTH}x{SCREEN_HEIGHT}.raw")
+        
+    def build_cache(self):
+        # Étape optionnelle : une passe de transcodage par résolution d'affichage
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for cinematic_name, cinematic in self.cinematics.items():
+            cache_path = self.cache_path(cinematic_name)
+            if not os.path.exists(cache_path):
+                print(f"Transcodage de {cinematic['video']} vers {cache_path}")
+                transcode_cinematic(cinematic['video'], cache_path, (SCREEN_WIDTH, SCREEN_HEIGHT))
+        
     def play_cinematic(self, cinematic_name):
         if cinematic_name not in self.played_cinematics and cinematic_name in self.cinematics:
             video_path = self.cinematics[cinematic_name]['video']
             sound_path = self.cinematics[cinematic_name]['sound']
             
-            self.current_cinematic = Cinematic(video_path, sound_path)
+            if self.current_cinematic:
+                self.current_cinematic.close()
+            self.current_cinematic = Cinematic(video_path, sound_path, self.cache_path(cinematic_name), self.clock)
             self.played_cinematics.add(cinematic_name)
             
-            pygame.mixer.music.pause()
+            audio_manager.pause_music()
             
             return True
         return False
         
-    def update(self, events):
+    def reset(self):
         if self.current_cinematic:
-            self.current_cinematic.update(events)
+            self.current_cinematic.finish()
+            self.current_cinematic = None
+            audio_manager.resume_music()
+        self.played_cinematics.clear()
+        
+    def skip(self):
+        if self.current_cinematic:
+            self.current_cinematic.skip()
+            
+    def update(self):
+        if self.current_cinematic:
+            self.current_cinematic.update()
             if self.current_cinematic.finished:
-                pygame.mixer.music.unpause()
+                audio_manager.resume_music()
                 self.current_cinematic = None
                 return True
         return False
@@ -110,3 +379,6 @@ class CinematicManager:
         
     def is_playing(self):
         return self.current_cinematic is not None
+
+if __name__ == '__main__':
+    CinematicManager().build_cache()
@@ -5,13 +5,26 @@
 ## constants
 ##
 
+import os
 import pygame
+from settings import load_settings
 
-pygame.init()
+# Seul le module d'affichage est nécessaire ici, le reste est initialisé par Game
+pygame.display.init()
+
+settings = load_settings()
 
 info = pygame.display.Info()
-SCREEN_WIDTH = info.current_w
-SCREEN_HEIGHT = info.current_h
+DISPLAY_WIDTH = info.current_w
+DISPLAY_HEIGHT = info.current_h
+
+# Résolution interne de rendu : None = résolution native de l'écran
+RENDER_RESOLUTIONS = [None, (1920, 1080), (1280, 720)]
+RENDER_RESOLUTION = tuple(settings['render_resolution']) if settings.get('render_resolution') else None
+# LOOP_RESOLUTION=1280x720 impose la résolution interne (banc de mesure)
+if os.environ.get('LOOP_RESOLUTION'):
+    RENDER_RESOLUTION = tuple(int(value) for value in os.environ['LOOP_RESOLUTION'].split('x'))
+SCREEN_WIDTH, SCREEN_HEIGHT = RENDER_RESOLUTION or (DISPLAY_WIDTH, DISPLAY_HEIGHT)
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -30,5 +43,24 @@ ROOM_HEIGHT = SCREEN_HEIGHT
 DOOR_WIDTH = SCREEN_WIDTH // 20
 DOOR_HEIGHT = SCREEN_HEIGHT // 4
 
+# Décalages verticaux réglés sur 1080 lignes, mis à l'échelle de la résolution interne
+REFERENCE_HEIGHT = 1080
+
+def scaled_height(pixels):
+    return pixels * SCREEN_HEIGHT // REFERENCE_HEIGHT
+
+GROUND_OFFSET = scaled_height(250)
+DOOR_FLOOR_OFFSET = scaled_height(50)
+ITEM_OFFSET = scaled_height(150)
+ITEM_PROMPT_OFFSET = scaled_height(180)
+POWER_OFFSET = scaled_height(200)
+SWITCH_OFFSET = scaled_height(170)
+SWITCH_PROMPT_OFFSET = scaled_height(200)
+
 BACKGROUND_WIDTH = SCREEN_WIDTH
 BACKGROUND_HEIGHT = SCREEN_HEIGHT
+
+SIMULATION_RATE = 60
+SIMULATION_STEP = 1 / SIMULATION_RATE
+MAX_FRAME_TIME = 0.25
+MAX_FPS = 144
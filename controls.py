@@ -0,0 +1,224 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## controls
+##
+
+import struct
+import time
+from array import array
+import pygame
+
+RECORD_MAGIC = b'LOOPREC2'
+# magique, largeur, hauteur, fréquence de simulation, salles de la boucle générée (0 : fichier), graine
+RECORD_HEADER = struct.Struct('<8sHHHIq')
+# durée de l'image, horloge (ms), touches enfoncées, indicateurs, nombre d'événements
+FRAME_RECORD = struct.Struct('<dIIBH')
+EVENT_TYPE = struct.Struct('<H')
+KEY_EVENT = struct.Struct('<iH')
+MOTION_EVENT = struct.Struct('<hh')
+BUTTON_EVENT = struct.Struct('<hhB')
+
+FLAG_ASSETS_READY = 1
+
+# Touches lues par le jeu, une par bit du masque enregistré
+TRACKED_KEYS = (
+    pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN,
+    pygame.K_SPACE, pygame.K_RETURN, pygame.K_ESCAPE, pygame.K_e, pygame.K_i,
+)
+KEY_BITS = {key: 1 << bit for bit, key in enumerate(TRACKED_KEYS)}
+
+class KeyState:
+    # Même accès que pygame.key.get_pressed() : keys[pygame.K_LEFT]
+    __slots__ = ('mask',)
+
+    def __init__(self, mask=0):
+        self.mask = mask
+
+    def __getitem__(self, key):
+        return bool(self.mask & KEY_BITS.get(key, 0))
+
+def key_mask(pressed):
+    mask = 0
+    for key, bit in KEY_BITS.items():
+        if pressed[key]:
+            mask |= bit
+    return mask
+
+def read_header(path):
+    # Renvoie (largeur, hauteur), fréquence de simulation, salles (None : niveau du fichier), graine
+    with open(path, 'rb') as record_file:
+        header = record_file.read(RECORD_HEADER.size)
+    if len(header) < RECORD_HEADER.size or header[:len(RECORD_MAGIC)] != RECORD_MAGIC:
+        raise ValueError(f"{path} n'est pas un enregistrement de partie")
+    magic, width, height, simulation_rate, rooms, seed = RECORD_HEADER.unpack(header)
+    return (width, height), simulation_rate, rooms or None, seed
+
+class EventDispatcher:
+    # Abonnés par type d'événement ; un abonné qui renvoie True consomme l'événement
+    def __init__(self):
+        self.subscribers = {}
+
+    def subscribe(self, event_type, handler):
+        self.subscribers.setdefault(event_type, []).append(handler)
+
+    def unsubscribe(self, event_type, handler):
+        handlers = self.subscribers.get(event_type)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+
+    def dispatch(self, event, fallback=None):
+        # Les abonnés passent d'abord, fallback (l'état courant) reçoit le reste
+        for handler in self.subscribers.get(event.type, ()):
+            if handler(event):
+                return True
+        if fallback:
+            fallback(event)
+        return False
+
+class Controls:
+    # Entrées et horloge en direct ; l'état est échantillonné une fois par image
+    def __init__(self):
+        self.keys = KeyState()
+        self.ticks = 0
+        self.assets_ready = False
+
+    def tick(self, clock, max_fps):
+        frame_time = clock.tick(max_fps) / 1000
+        self.ticks = pygame.time.get_ticks()
+        return frame_time
+
+    def get_ticks(self):
+        return self.ticks
+
+    def sync_assets(self, loader):
+        self.assets_ready = loader.hot_ready()
+        return self.assets_ready
+
+    def get_events(self, remap=None):
+        events = pygame.event.get()
+        if remap:
+            events = [pygame.event.Event(event.type, dict(event.dict, pos=remap(event.pos)))
+                      if hasattr(event, 'pos') else event for event in events]
+        self.keys.mask = key_mask(pygame.key.get_pressed())
+        return events
+
+    def end_frame(self):
+        pass
+
+    def close(self):
+        pass
+
+class RecordingControls(Controls):
+    def __init__(self, path, resolution, simulation_rate, rooms=None, seed=0):
+        super().__init__()
+        self.record_file = open(path, 'wb')
+        self.record_file.write(RECORD_HEADER.pack(RECORD_MAGIC, *resolution, simulation_rate, rooms or 0, seed))
+        self.frame_time = 0
+        self.events = []
+
+    def tick(self, clock, max_fps):
+        self.frame_time = super().tick(clock, max_fps)
+        return self.frame_time
+
+    def get_events(self, remap=None):
+        self.events = super().get_events(remap)
+        return self.events
+
+    def end_frame(self):
+        encoded = [encode_event(event) for event in self.events]
+        encoded = [data for data in encoded if data is not None]
+        flags = FLAG_ASSETS_READY if self.assets_ready else 0
+        self.record_file.write(FRAME_RECORD.pack(self.frame_time, self.ticks, self.keys.mask, flags, len(encoded)))
+        self.record_file.write(b''.join(encoded))
+
+    def close(self):
+        self.record_file.close()
+
+class ReplayControls(Controls):
+    # Rejoue un enregistrement ; sans realtime, les images s'enchaînent sans attendre
+    def __init__(self, path, realtime=False):
+        super().__init__()
+        self.resolution, self.simulation_rate, self.rooms, self.seed = read_header(path)
+        with open(path, 'rb') as record_file:
+            self.data = record_file.read()
+        self.offset = RECORD_HEADER.size
+        self.realtime = realtime
+        self.finished = False
+        self.events = []
+        self.frame_start = 0
+        # Tableau de doubles : une durée ajoutée par image sans objet float conservé
+        self.frame_times = array('d')
+
+    def check_format(self, resolution, simulation_rate):
+        # Positions, vitesses et déclencheurs dépendent de la résolution : un écart ferait dériver la partie
+        if (self.resolution, self.simulation_rate) != (tuple(resolution), simulation_rate):
+            raise ValueError("enregistrement en %dx%d à %d Hz, jeu en %dx%d à %d Hz : "
+                             "relancer avec LOOP_RESOLUTION=%dx%d"
+                             % (*self.resolution, self.simulation_rate, *resolution, simulation_rate,
+                                *self.resolution))
+
+    def tick(self, clock, max_fps):
+        if self.offset >= len(self.data):
+            self.finished = True
+            self.events = [pygame.event.Event(pygame.QUIT)]
+            return 0
+        frame_time, self.ticks, mask, flags, event_count = FRAME_RECORD.unpack_from(self.data, self.offset)
+        self.offset += FRAME_RECORD.size
+        self.keys.mask = mask
+        self.assets_ready = bool(flags & FLAG_ASSETS_READY)
+        self.events = []
+        for _ in range(event_count):
+            event, self.offset = decode_event(self.data, self.offset)
+            self.events.append(event)
+        if self.realtime:
+            clock.tick(round(1 / frame_time) if frame_time else 0)
+        self.frame_start = time.perf_counter()
+        return frame_time
+
+    def sync_assets(self, loader):
+        # Le chargement se fait sur d'autres threads : on l'attend là où l'enregistrement l'avait vu fini
+        if self.assets_ready:
+            while not loader.hot_ready():
+                loader.poll()
+                time.sleep(0.001)
+        return self.assets_ready
+
+    def get_events(self, remap=None):
+        # Les positions enregistrées sont déjà en coordonnées internes
+        pygame.event.pump()
+        return self.events
+
+    def end_frame(self):
+        self.frame_times.append(time.perf_counter() - self.frame_start)
+
+def encode_event(event):
+    if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+        payload = KEY_EVENT.pack(event.key, event.mod)
+    elif event.type == pygame.MOUSEMOTION:
+        payload = MOTION_EVENT.pack(*event.pos)
+    elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        payload = BUTTON_EVENT.pack(*event.pos, event.button)
+    elif event.type == pygame.QUIT:
+        payload = b''
+    else:
+        return None
+    return EVENT_TYPE.pack(event.type) + payload
+
+def decode_event(data, offset):
+    event_type, = EVENT_TYPE.unpack_from(data, offset)
+    offset += EVENT_TYPE.size
+    if event_type in (pygame.KEYDOWN, pygame.KEYUP):
+        key, mod = KEY_EVENT.unpack_from(data, offset)
+        offset += KEY_EVENT.size
+        return pygame.event.Event(event_type, key=key, mod=mod, unicode='', scancode=0), offset
+    if event_type == pygame.MOUSEMOTION:
+        x, y = MOTION_EVENT.unpack_from(data, offset)
+        offset += MOTION_EVENT.size
+        return pygame.event.Event(event_type, pos=(x, y), rel=(0, 0), buttons=(0, 0, 0)), offset
+    if event_type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        x, y, button = BUTTON_EVENT.unpack_from(data, offset)
+        offset += BUTTON_EVENT.size
+        return pygame.event.Event(event_type, pos=(x, y), button=button), offset
+    return pygame.event.Event(event_type), offset
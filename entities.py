@@ -0,0 +1,71 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## entities
+##
+
+ITEM_KEY = 0
+ITEM_INVERSION_POWER = 1
+
+ITEM_TYPES = {
+    'key': ITEM_KEY,
+    'inversion_power': ITEM_INVERSION_POWER,
+}
+
+class Item:
+    # index : position dans Room.items, clé de l'état persistant de la salle
+    __slots__ = ('x', 'y', 'kind', 'hidden', 'collected', 'index')
+
+    def __init__(self, x, y, kind, hidden=False, index=0):
+        self.x = x
+        self.y = y
+        self.kind = kind
+        self.hidden = hidden
+        self.collected = False
+        self.index = index
+
+class Switch:
+    # index : position dans Room.switches, clé de l'état persistant de la salle
+    __slots__ = ('x', 'y', 'hidden', 'activated', 'index')
+
+    def __init__(self, x, y, hidden=False, index=0):
+        self.x = x
+        self.y = y
+        self.hidden = hidden
+        self.activated = False
+        self.index = index
+
+class Door:
+    __slots__ = ('direction', 'rect', 'target')
+
+    def __init__(self, direction, rect, target=None):
+        self.direction = direction
+        self.rect = rect
+        self.target = target
+
+class Inventory:
+    # Nombre d'exemplaires par type d'objet : ajout, test et retrait en temps constant
+    __slots__ = ('counts',)
+
+    def __init__(self):
+        self.counts = [0] * len(ITEM_TYPES)
+
+    def add(self, kind):
+        self.counts[kind] += 1
+
+    def count(self, kind):
+        return self.counts[kind]
+
+    def remove(self, kind):
+        if self.counts[kind]:
+            self.counts[kind] -= 1
+            return True
+        return False
+
+    def clear(self):
+        for kind in range(len(self.counts)):
+            self.counts[kind] = 0
+
+    def __contains__(self, kind):
+        return self.counts[kind] > 0
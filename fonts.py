@@ -0,0 +1,77 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## fonts
+##
+
+import pygame
+from collections import OrderedDict
+from constants import *
+
+TEXT_CACHE_SIZE = 256
+HUE_STEPS = 72
+
+def to_display_format(surface):
+    # Texte rendu au format de l'écran dès qu'il existe, pour des blits sans conversion
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha()
+
+class TextCache:
+    def __init__(self, capacity=TEXT_CACHE_SIZE):
+        self.capacity = capacity
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+    def get_font(self, size, name=None):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(name, size)
+            self.fonts[key] = font
+        return font
+
+    def render(self, text, size, color, name=None):
+        # Un texte identique n'est rendu qu'une fois tant qu'il reste dans le cache
+        key = (text, name, size, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = to_display_format(self.get_font(size, name).render(text, True, color))
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+text_cache = TextCache()
+
+class GlyphAtlas:
+    # Rempli à la demande : seuls les caractères et pas de teinte réellement affichés sont rendus
+    def __init__(self, size, name=None, hue_steps=HUE_STEPS):
+        self.size = size
+        self.name = name
+        self.hue_steps = hue_steps
+        self.white_glyphs = {}
+        self.glyphs = {}
+
+    def white_glyph(self, char):
+        # Chaque caractère est rendu en blanc une fois, puis teinté pour chaque pas de teinte
+        glyph = self.white_glyphs.get(char)
+        if glyph is None:
+            font = text_cache.get_font(self.size, self.name)
+            glyph = to_display_format(font.render(char, True, WHITE))
+            self.white_glyphs[char] = glyph
+        return glyph
+
+    def get(self, char, hue):
+        step = int(hue * self.hue_steps / 360) % self.hue_steps
+        glyph = self.glyphs.get((char, step))
+        if glyph is None:
+            color = pygame.Color(0)
+            color.hsva = (step * 360 / self.hue_steps, 100, 100, 100)
+            glyph = self.white_glyph(char).copy()
+            glyph.fill(color, special_flags=pygame.BLEND_RGBA_MULT)
+            self.glyphs[(char, step)] = glyph
+        return glyph
@@ -9,111 +9,167 @@ import pygame
 import math
 from player import Player
 from room import Room, RoomManager
+from levels import load_level
 from cinematics import CinematicManager
+from audio import audio_manager
+from renderer import DirtyRectRenderer
 from constants import *
+from assets import asset_cache
+from atlas import sprite_atlas
+from settings import save_settings
+from fonts import text_cache, GlyphAtlas
+from entities import ITEM_KEY
+
+HOVER_STEPS = 10
 
 class Button:
     def __init__(self, text, font_size, y_position, width=300, height=60):
         self.text = text
-        self.font = pygame.font.Font(None, font_size)
+        self.font_size = font_size
         self.width = width
         self.height = height
         self.color = WHITE
         self.hover_factor = 0
         self.y_position = y_position
         self.animation_time = 0
+        self.images = {}
+        self.layout()
         
-    def draw(self, screen, selected=False, hover=False):
-        x = SCREEN_WIDTH // 2
-        y = self.y_position
-        self.animation_time += 0.05
-        float_offset = math.sin(self.animation_time) * 5
+    def layout(self):
+        # Recalculé seulement quand le mode d'affichage change (Game.set_display_mode)
+        self.center_x = SCREEN_WIDTH // 2
+        self.images.clear()
+        self.update_rect()
+        
+    def set_text(self, text):
+        if text != self.text:
+            self.text = text
+            self.images.clear()
+        
+    def update(self, dt, selected=False, hover=False):
+        step = dt * SIMULATION_RATE
+        self.animation_time += 0.05 * step
         if selected or hover:
-            self.hover_factor = min(1.0, self.hover_factor + 0.1)
+            self.hover_factor = min(1.0, self.hover_factor + 0.1 * step)
         else:
-            self.hover_factor = max(0.0, self.hover_factor - 0.1)
-        current_width = self.width + (50 * self.hover_factor)
-        current_height = self.height + (10 * self.hover_factor)
-        outer_rect = pygame.Rect(
-            x - current_width//2,
-            y - current_height//2 + float_offset,
+            self.hover_factor = max(0.0, self.hover_factor - 0.1 * step)
+        self.update_rect()
+        
+    def update_rect(self):
+        # Rectangle de test de survol, mis à jour une fois par pas de simulation
+        self.hover_step = round(self.hover_factor * HOVER_STEPS)
+        float_offset = math.sin(self.animation_time) * 5
+        current_width = self.width + (50 * self.hover_step // HOVER_STEPS)
+        current_height = self.height + (10 * self.hover_step // HOVER_STEPS)
+        self.rect = pygame.Rect(
+            self.center_x - current_width//2,
+            self.y_position - current_height//2 + float_offset,
             current_width,
             current_height
         )
-        color = RED if selected else WHITE
-        pygame.draw.rect(screen, color, outer_rect, 2, border_radius=15)
-        text_surface = self.font.render(self.text, True, color)
-        text_rect = text_surface.get_rect(center=(x, y + float_offset))
-        screen.blit(text_surface, text_rect)
-        return outer_rect
+        
+    def get_image(self, selected):
+        # Contour et texte pré-rendus par couleur et par pas de survol
+        key = (selected, self.hover_step)
+        image = self.images.get(key)
+        if image is None:
+            color = RED if selected else WHITE
+            text_surface = text_cache.render(self.text, self.font_size, color)
+            outline = pygame.Rect(0, 0, self.rect.width, self.rect.height)
+            image = pygame.Surface((max(outline.width, text_surface.get_width()),
+                                    max(outline.height, text_surface.get_height())), pygame.SRCALPHA).convert_alpha()
+            outline.center = image.get_rect().center
+            pygame.draw.rect(image, color, outline, 2, border_radius=15)
+            image.blit(text_surface, text_surface.get_rect(center=outline.center))
+            self.images[key] = image
+        return image
+        
+    def draw(self, screen, selected=False):
+        image = self.get_image(selected)
+        screen.blit(image, image.get_rect(center=self.rect.center))
+        return self.rect
 
-class MenuState:
-    try:
-        title_image = pygame.image.load('assets/image/title.png')
-        background_image = pygame.image.load('assets/image/menu_background.jpg')
-    except pygame.error as e:
-        print(f"Erreur: Impossible de charger les images: {e}")
-        title_image = None
-        background_image = None
+class ButtonGroup:
+    def __init__(self, buttons):
+        self.buttons = buttons
+        self.selected = next(iter(buttons))
+        self.mouse_pos = (0, 0)
+        
+    def layout(self):
+        for button in self.buttons.values():
+            button.layout()
+            
+    def move_selection(self, offset):
+        options = list(self.buttons.keys())
+        current_index = options.index(self.selected)
+        self.selected = options[(current_index + offset) % len(options)]
+        
+    def hit_test(self, pos):
+        for button_name, button in self.buttons.items():
+            if button.rect.collidepoint(pos):
+                return button_name
+        return None
+        
+    def handle_event(self, event):
+        # Renvoie le nom du bouton activé, ou None
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_UP:
+                self.move_selection(-1)
+            elif event.key == pygame.K_DOWN:
+                self.move_selection(1)
+            elif event.key == pygame.K_RETURN:
+                return self.selected
+        elif event.type == pygame.MOUSEMOTION:
+            self.mouse_pos = event.pos
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:
+                return self.hit_test(event.pos)
+        return None
+        
+    def update(self, dt):
+        for button_name, button in self.buttons.items():
+            button.update(dt, button_name == self.selected, button.rect.collidepoint(self.mouse_pos))
+            
+    def draw(self, screen):
+        for button_name, button in self.buttons.items():
+            button.draw(screen, button_name == self.selected)
 
+class MenuState:
     def __init__(self, game):
         self.game = game
         spacing = 100
         base_y = SCREEN_HEIGHT//2 - 50
-        self.buttons = {
+        self.menu = ButtonGroup({
             'play': Button('Jouer', 64, base_y),
             'options': Button('Options', 64, base_y + spacing),
             'fullscreen': Button('Plein écran', 64, base_y + spacing * 2),
             'quit': Button('Quitter', 64, base_y + spacing * 3)
-        }
-        self.selected = 'play'
-        self.mouse_pos = (0, 0)
+        })
         self.animation_time = 0
-        if MenuState.title_image:
+        try:
             title_width = 900
             title_height = 400
-            self.title = pygame.transform.scale(MenuState.title_image, (title_width, title_height))
-        if MenuState.background_image:
-            self.background = pygame.transform.scale(MenuState.background_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            self.title = asset_cache.get_image('assets/image/title.png', (title_width, title_height), 'alpha')
+            self.background = asset_cache.get_image('assets/image/menu_background.jpg', (SCREEN_WIDTH, SCREEN_HEIGHT), 'opaque')
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"Erreur: Impossible de charger les images: {e}")
         
     def handle_event(self, event):
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_UP:
-                options = list(self.buttons.keys())
-                current_index = options.index(self.selected)
-                self.selected = options[(current_index - 1) % len(options)]
-            elif event.key == pygame.K_DOWN:
-                options = list(self.buttons.keys())
-                current_index = options.index(self.selected)
-                self.selected = options[(current_index + 1) % len(options)]
-            elif event.key == pygame.K_RETURN:
-                if self.selected == 'play':
-                    self.game.change_state('game')
-                elif self.selected == 'options':
-                    self.game.change_state('options')
-                elif self.selected == 'fullscreen':
-                    self.game.toggle_fullscreen()
-                elif self.selected == 'quit':
-                    self.game.running = False
-        elif event.type == pygame.MOUSEMOTION:
-            self.mouse_pos = event.pos
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:
-                for button_name, button in self.buttons.items():
-                    if button.draw(self.game.screen).collidepoint(event.pos):
-                        if button_name == 'play':
-                            self.game.change_state('game')
-                        elif button_name == 'options':
-                            self.game.change_state('options')
-                        elif button_name == 'fullscreen':
-                            self.game.toggle_fullscreen()
-                        elif button_name == 'quit':
-                            self.game.running = False
+        activated = self.menu.handle_event(event)
+        if activated == 'play':
+            self.game.change_state('game')
+        elif activated == 'options':
+            self.game.change_state('options')
+        elif activated == 'fullscreen':
+            self.game.toggle_fullscreen()
+        elif activated == 'quit':
+            self.game.running = False
                     
-    def update(self):
-        self.animation_time += 0.02
+    def update(self, dt):
+        self.animation_time += 0.02 * dt * SIMULATION_RATE
+        self.menu.update(dt)
         
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
         if hasattr(self, 'background'):
             screen.blit(self.background, (0, 0))
         else:
@@ -123,41 +179,95 @@ class MenuState:
             title_x = SCREEN_WIDTH//2 - self.title.get_width()//2
             title_y = SCREEN_HEIGHT//4 - self.title.get_height()//2 + offset
             screen.blit(self.title, (title_x, title_y))
-        for button_name, button in self.buttons.items():
-            is_selected = button_name == self.selected
-            is_hovered = button.draw(screen).collidepoint(self.mouse_pos)
-            button.draw(screen, is_selected, is_hovered)
+        self.menu.draw(screen)
+
+class LoadingState:
+    def __init__(self, game):
+        self.game = game
+        self.text = text_cache.render("Chargement...", 64, WHITE)
+        self.text_rect = self.text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 60))
+        self.bar_rect = pygame.Rect(SCREEN_WIDTH//4, SCREEN_HEIGHT//2, SCREEN_WIDTH//2, 30)
+        
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            self.game.change_state('menu')
+            
+    def update(self, dt):
+        # Game crée l'état de jeu dès que les ressources indispensables sont prêtes
+        if 'game' in self.game.states:
+            self.game.change_state('game')
+            
+    def draw(self, screen, alpha=1.0):
+        screen.fill(BLACK)
+        screen.blit(self.text, self.text_rect)
+        progress_rect = self.bar_rect.copy()
+        progress_rect.width = int(self.bar_rect.width * self.game.loader.progress())
+        pygame.draw.rect(screen, WHITE, progress_rect)
+        pygame.draw.rect(screen, WHITE, self.bar_rect, 2)
 
 class GameState:
     def __init__(self, game):
         self.game = game
         self.player = Player(SCREEN_WIDTH//2, SCREEN_HEIGHT - PLAYER_HEIGHT - 10)
-        self.room_manager = RoomManager()
+        self.room_manager = RoomManager(load_level(game.rooms, game.seed))
         self.room_manager.player = self.player
         self.inverted_colors = False
-        self.font = pygame.font.Font(None, 48)
-        self.cinematic_manager = CinematicManager()
-        self.cinematic_manager.play_cinematic('intro')
+        self.renderer = DirtyRectRenderer()
+        self.cinematic_manager = CinematicManager(clock=game.controls.get_ticks)
         try:
-            self.key_icon = pygame.image.load('assets/image/key.png').convert_alpha()
-            self.key_icon = pygame.transform.scale(self.key_icon, (40, 40))
+            self.key_icon = sprite_atlas.load('key', 'assets/image/key.png', (40, 40))
         except:
             print("Erreur: Impossible de charger l'icône de clé")
             self.key_icon = None
+        # Compteur de clés : fond créé une fois, texte rendu seulement quand le nombre change
+        self.counter_surface = pygame.Surface((120, 60), pygame.SRCALPHA).convert_alpha()
+        self.counter_surface.fill((0, 0, 0, 180))
+        self.counter_rect = self.counter_surface.get_rect(topleft=(20, 20))
+        self.key_count = None
+        self.key_count_text = None
+        self.step_frame = 0
+            
+    def reset(self):
+        # Nouvelle partie sur les objets déjà chargés : aucune ressource n'est rechargée
+        self.player.reset(SCREEN_WIDTH//2, SCREEN_HEIGHT - PLAYER_HEIGHT - 10)
+        self.room_manager.reset()
+        self.inverted_colors = False
+        self.renderer.invalidate()
+        self.cinematic_manager.reset()
+        self.cinematic_manager.play_cinematic('intro')
 
-    def draw_key_counter(self, screen):
-        counter_surface = pygame.Surface((120, 60), pygame.SRCALPHA)
-        counter_surface.fill((0, 0, 0, 180))
-        screen.blit(counter_surface, (20, 20))
+    def draw_key_counter(self, screen, dirty_rects):
+        screen.blit(self.counter_surface, self.counter_rect)
+        dirty_rects.append(self.counter_rect)
         if self.key_icon:
             screen.blit(self.key_icon, (30, 30))
-        key_count = self.player.inventory.count('key')
-        keys_text = self.font.render(f"x {key_count}", True, WHITE)
-        screen.blit(keys_text, (80, 35))
+        key_count = self.player.inventory.count(ITEM_KEY)
+        if key_count != self.key_count:
+            self.key_count = key_count
+            self.key_count_text = text_cache.render(f"x {key_count}", 48, WHITE)
+        dirty_rects.append(screen.blit(self.key_count_text, (80, 35)))
+        
+    def play_footsteps(self):
+        # Un pas quand l'animation de marche pose un pied au sol
+        frame = self.player.current_frame
+        if frame != self.step_frame and frame in self.player.STEP_FRAMES and self.player.is_moving \
+                and not self.player.is_jumping:
+            audio_manager.play_sound('footstep')
+        self.step_frame = frame
+        
+    def steady_key(self):
+        # Ce qui change d'une image stable à l'autre n'y figure pas (positions, animation)
+        if self.cinematic_manager.is_playing():
+            return None
+        room_manager = self.room_manager
+        return (room_manager.current_room.room_id, self.inverted_colors, tuple(self.player.inventory.counts),
+                self.player.has_inversion_power, room_manager.remaining_switches, len(room_manager.active_triggers))
         
     def handle_event(self, event):
         if self.cinematic_manager.is_playing():
-            self.cinematic_manager.update([event])
+            # La cinématique n'avance pas ici : seulement une fois par pas dans update
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                self.cinematic_manager.skip()
             return
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE:
@@ -165,15 +275,16 @@ class GameState:
             elif event.key == pygame.K_i and self.player.has_inversion_power:
                 self.inverted_colors = not self.inverted_colors
                 
-    def update(self):
+    def update(self, dt):
         if self.cinematic_manager.is_playing():
-            if self.cinematic_manager.update(pygame.event.get()):
+            if self.cinematic_manager.update():
                 if 'ending' in self.cinematic_manager.played_cinematics:
                     self.game.change_state('victory')
             return
-        keys = pygame.key.get_pressed()
-        self.player.update(keys)
-        self.room_manager.update(self.player)
+        keys = self.game.get_pressed_keys()
+        self.player.update(keys, dt)
+        self.play_footsteps()
+        self.room_manager.update(self.player, keys, dt)
         current_room = self.room_manager.current_room.room_id
         if current_room == 4 and 'first_key' not in self.cinematic_manager.played_cinematics:
             self.cinematic_manager.play_cinematic('first_key')
@@ -182,119 +293,115 @@ class GameState:
         if self.room_manager.game_completed and 'ending' not in self.cinematic_manager.played_cinematics:
             self.cinematic_manager.play_cinematic('ending')
         
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
         if self.cinematic_manager.is_playing():
             self.cinematic_manager.draw(screen)
-            return
+            self.renderer.invalidate()
+            return None
+        room = self.room_manager.current_room
+        self.renderer.begin(screen, room.get_static_layer(self.inverted_colors))
+        dirty_rects = self.renderer.dirty_rects
+        self.room_manager.draw_dynamic(screen, self.inverted_colors, dirty_rects)
         if not self.inverted_colors:
-            self.room_manager.draw(screen, False)
-            self.player.draw(screen)
+            dirty_rects.append(self.player.draw(screen, alpha))
         else:
-            self.room_manager.draw(screen, True)
-            self.player.draw_inverted(screen)
-        self.draw_key_counter(screen)
+            dirty_rects.append(self.player.draw_inverted(screen, alpha))
+        self.draw_key_counter(screen, dirty_rects)
+        return self.renderer.end()
 
 class OptionsState:
     def __init__(self, game):
         self.game = game
-        self.font = pygame.font.Font(None, 48)
         spacing = 100
         base_y = SCREEN_HEIGHT//2 - 100
-        self.buttons = {
+        self.menu = ButtonGroup({
             'music': Button('Musique: ON', 64, base_y),
-            'back': Button('Retour', 64, base_y + spacing)
-        }
-        self.selected = 'music'
-        self.mouse_pos = (0, 0)
+            'resolution': Button('', 64, base_y + spacing, width=700),
+            'back': Button('Retour', 64, base_y + spacing * 2)
+        })
         self.music_on = True
+        self.render_resolution = RENDER_RESOLUTION
+        self.update_resolution_text()
         
     def handle_event(self, event):
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_UP or event.key == pygame.K_DOWN:
-                self.selected = 'back' if self.selected == 'music' else 'music'
-            elif event.key == pygame.K_RETURN:
-                if self.selected == 'music':
-                    self.toggle_music()
-                elif self.selected == 'back':
-                    self.game.change_state('menu')
-            elif event.key == pygame.K_ESCAPE:
-                self.game.change_state('menu')
-        elif event.type == pygame.MOUSEMOTION:
-            self.mouse_pos = event.pos
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:
-                for button_name, button in self.buttons.items():
-                    if button.draw(self.game.screen).collidepoint(event.pos):
-                        if button_name == 'music':
-                            self.toggle_music()
-                        elif button_name == 'back':
-                            self.game.change_state('menu')
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            self.game.change_state('menu')
+            return
+        activated = self.menu.handle_event(event)
+        if activated == 'music':
+            self.toggle_music()
+        elif activated == 'resolution':
+            self.cycle_resolution()
+        elif activated == 'back':
+            self.game.change_state('menu')
                     
     def toggle_music(self):
         self.music_on = not self.music_on
+        audio_manager.set_music_enabled(self.music_on)
         if self.music_on:
-            pygame.mixer.music.unpause()
-            self.buttons['music'].text = 'Musique: ON'
+            self.menu.buttons['music'].set_text('Musique: ON')
+        else:
+            self.menu.buttons['music'].set_text('Musique: OFF')
+            
+    def cycle_resolution(self):
+        # Appliquée au prochain lancement : toutes les tailles dérivent de la résolution interne
+        current_index = RENDER_RESOLUTIONS.index(self.render_resolution) if self.render_resolution in RENDER_RESOLUTIONS else 0
+        self.render_resolution = RENDER_RESOLUTIONS[(current_index + 1) % len(RENDER_RESOLUTIONS)]
+        settings['render_resolution'] = self.render_resolution
+        save_settings(settings)
+        self.update_resolution_text()
+        
+    def update_resolution_text(self):
+        if self.render_resolution:
+            text = f"Résolution: {self.render_resolution[0]}x{self.render_resolution[1]}"
         else:
-            pygame.mixer.music.pause()
-            self.buttons['music'].text = 'Musique: OFF'
+            text = "Résolution: Native"
+        if self.render_resolution != RENDER_RESOLUTION:
+            text += " (redémarrage)"
+        self.menu.buttons['resolution'].set_text(text)
                     
-    def update(self):
-        pass
+    def update(self, dt):
+        self.menu.update(dt)
         
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
         screen.fill(BLACK)
-        title_font = pygame.font.Font(None, 100)
-        title_text = title_font.render("Options", True, WHITE)
+        title_text = text_cache.render("Options", 100, WHITE)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//4))
         screen.blit(title_text, title_rect)
-        for button_name, button in self.buttons.items():
-            is_selected = button_name == self.selected
-            is_hovered = button.draw(screen).collidepoint(self.mouse_pos)
-            button.draw(screen, is_selected, is_hovered)
+        self.menu.draw(screen)
 
 class VictoryState:
     def __init__(self, game):
         self.game = game
-        self.buttons = {
+        self.menu = ButtonGroup({
             'menu': Button('Menu Principal', 64, SCREEN_HEIGHT//2 + 100)
-        }
-        self.selected = 'menu'
-        self.mouse_pos = (0, 0)
+        })
         self.animation_time = 0
+        self.main_text = "Félicitations !"
+        # Glyphes teintés rendus au premier affichage, pas au démarrage
+        self.title_atlas = GlyphAtlas(100)
         
     def handle_event(self, event):
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_RETURN or event.key == pygame.K_ESCAPE:
-                self.game.change_state('menu')
-        elif event.type == pygame.MOUSEMOTION:
-            self.mouse_pos = event.pos
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:
-                if self.buttons['menu'].draw(self.game.screen).collidepoint(event.pos):
-                    self.game.change_state('menu')
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            self.game.change_state('menu')
+        elif self.menu.handle_event(event) == 'menu':
+            self.game.change_state('menu')
                 
-    def update(self):
-        self.animation_time += 0.02
+    def update(self, dt):
+        self.animation_time += 0.02 * dt * SIMULATION_RATE
+        self.menu.update(dt)
         
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
         screen.fill(BLACK)
-        title_font = pygame.font.Font(None, 100)
-        main_text = "Félicitations !"
+        main_text = self.main_text
         offset_y = math.sin(self.animation_time) * 20
         for i in range(len(main_text)):
             hue = (self.animation_time * 100 + i * 20) % 360
-            color = pygame.Color(0)
-            color.hsva = (hue, 100, 100, 100)
-            char = title_font.render(main_text[i], True, color)
+            char = self.title_atlas.get(main_text[i], hue)
             x = SCREEN_WIDTH//2 - (len(main_text) * 25) + (i * 50)
             y = SCREEN_HEIGHT//3 + offset_y
             screen.blit(char, (x, y))
-        subtitle_font = pygame.font.Font(None, 64)
-        subtitle = subtitle_font.render("Vous vous êtes échappé !", True, WHITE)
+        subtitle = text_cache.render("Vous vous êtes échappé !", 64, WHITE)
         subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
         screen.blit(subtitle, subtitle_rect)
-        for button_name, button in self.buttons.items():
-            is_selected = button_name == self.selected
-            is_hovered = button.draw(screen).collidepoint(self.mouse_pos)
-            button.draw(screen, is_selected, is_hovered)
+        self.menu.draw(screen)
@@ -0,0 +1,62 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## hud
+##
+
+import pygame
+import time
+from constants import *
+from assets import asset_cache
+from fonts import text_cache
+from profiler import frame_profiler
+
+HUD_REFRESH = 0.25
+HUD_FONT_SIZE = 18
+HUD_LINE_HEIGHT = 22
+HUD_WIDTH = 440
+
+class ProfilerHud:
+    def __init__(self, profiler=frame_profiler):
+        self.profiler = profiler
+        self.surface = None
+        self.refreshed_at = 0
+        self.font = None
+
+    def lines(self):
+        profiler = self.profiler
+        frame_time = profiler.averages.get('frame', 0)
+        fps = 1000 / profiler.frame_interval if profiler.frame_interval else 0
+        lines = [f"Image {frame_time:6.2f} ms  {fps:6.1f} FPS"]
+        for name, duration in sorted(profiler.averages.items(), key=lambda item: -item[1]):
+            if name != 'frame':
+                lines.append(f"{name:<28}{duration:7.2f} ms")
+        lines.append(f"Surfaces {asset_cache.memory_used / (1024 * 1024):8.1f} Mo")
+        lines.append(f"Sons     {asset_cache.sound_memory_used / (1024 * 1024):8.1f} Mo")
+        return lines
+
+    def get_font(self):
+        # Recherchée au premier affichage : match_font peut lancer fc-list, à éviter au démarrage
+        if self.font is None:
+            # Police à chasse fixe pour aligner les colonnes, police par défaut sinon
+            font_name = pygame.font.match_font('dejavusansmono,couriernew,monospace')
+            self.font = text_cache.get_font(HUD_FONT_SIZE, font_name)
+        return self.font
+
+    def refresh(self):
+        # Texte recomposé quelques fois par seconde, pas à chaque image
+        font = self.get_font()
+        lines = self.lines()
+        self.surface = pygame.Surface((HUD_WIDTH, len(lines) * HUD_LINE_HEIGHT + 10)).convert()
+        self.surface.fill(BLACK)
+        for index, line in enumerate(lines):
+            self.surface.blit(font.render(line, True, WHITE),
+                              (5, 5 + index * HUD_LINE_HEIGHT))
+
+    def draw(self, screen):
+        now = time.perf_counter()
+        if self.surface is None or now - self.refreshed_at >= HUD_REFRESH:
+            self.refresh()
+            self.refreshed_at = now
+        return screen.blit(self.surface, (SCREEN_WIDTH - HUD_WIDTH - 10, 10))
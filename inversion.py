@@ -0,0 +1,45 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## inversion
+##
+
+import pygame
+from constants import *
+
+numpy = None
+
+def load_numpy():
+    # NumPy est facultatif et lourd à importer : chargé au premier besoin seulement
+    global numpy
+    if numpy is None:
+        try:
+            import numpy as numpy_module
+            numpy = numpy_module
+        except ImportError:
+            numpy = False
+    return numpy
+
+def invert_color(color):
+    return tuple(255 - component for component in color[:3]) + tuple(color[3:])
+
+def invert_surface(surface):
+    # Une seule passe sur toute la surface, la transparence d'origine est conservée
+    inverted = surface.copy()
+    if load_numpy():
+        try:
+            pixels = pygame.surfarray.pixels3d(inverted)
+        except (ValueError, pygame.error):
+            pixels = None
+        if pixels is not None:
+            numpy.subtract(255, pixels, out=pixels)
+            del pixels
+            return inverted
+    # Sans NumPy : 255 - c obtenu en soustrayant l'image d'un fond blanc
+    negative = pygame.Surface(surface.get_size())
+    negative.fill(WHITE)
+    negative.blit(surface, (0, 0), special_flags=pygame.BLEND_RGB_SUB)
+    inverted.fill(BLACK, special_flags=pygame.BLEND_RGB_MULT)
+    inverted.blit(negative, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+    return inverted
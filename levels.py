@@ -0,0 +1,95 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## levels
+##
+
+import argparse
+import json
+
+LEVEL_PATH = 'levels/loop.json'
+
+# Boucle générée : un bloc de BLOCK_SIZE salles contient une clé puis un interrupteur
+BLOCK_SIZE = 8
+KEY_ROOM = 4
+POWER_ROOM = 6
+SWITCH_ROOM = 7
+HIDDEN_CHANCE = 0.3
+BONUS_KEY_CHANCE = 0.05
+MASK64 = (1 << 64) - 1
+
+# Format d'une salle : {"id", "doors": {"front": id, "back": id},
+# "items" / "hidden_items": [[x, y, type]], "switches" / "hidden_switches": [[x, y]],
+# "decor": [x, y, largeur, hauteur]} ; coordonnées en fractions de l'écran
+
+class LevelFile:
+    def __init__(self, path=LEVEL_PATH):
+        with open(path) as level_file:
+            data = json.load(level_file)
+        self.start = data.get('start', 0)
+        self.specs = {spec['id']: spec for spec in data['rooms']}
+        self.room_count = len(self.specs)
+        self.switch_total = sum(len(spec.get('switches', ())) + len(spec.get('hidden_switches', ()))
+                                for spec in self.specs.values())
+
+    def room_spec(self, room_id):
+        return self.specs[room_id]
+
+def splitmix64(value):
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+class GeneratedLevel:
+    # Même interface que LevelFile, mais chaque salle est dérivée de (graine, id) à la demande :
+    # rien n'est construit d'avance, une boucle de 100 000 salles ne coûte rien à créer
+    def __init__(self, room_count, seed=0):
+        if room_count < BLOCK_SIZE:
+            raise ValueError(f"une boucle générée compte au moins {BLOCK_SIZE} salles")
+        self.start = 0
+        self.seed = seed
+        self.room_count = room_count
+        # Un interrupteur par bloc complet, sa clé est toujours placée avant lui dans le bloc
+        self.switch_total = room_count // BLOCK_SIZE
+
+    def random(self, room_id, draw):
+        # Tirage reproductible dans [0, 1), indépendant de l'ordre de visite des salles
+        value = splitmix64(splitmix64(self.seed ^ (room_id << 8)) ^ draw)
+        return value / (1 << 64)
+
+    def room_spec(self, room_id):
+        if not 0 <= room_id < self.room_count:
+            raise KeyError(room_id)
+        spec = {'id': room_id, 'doors': {'front': (room_id + 1) % self.room_count,
+                                         'back': (room_id - 1) % self.room_count}}
+        offset = room_id % BLOCK_SIZE
+        # Le premier bloc reste visible : la clé et l'interrupteur cachés viennent après le pouvoir
+        hidden = room_id >= BLOCK_SIZE and self.random(room_id, 0) < HIDDEN_CHANCE
+        if room_id == POWER_ROOM:
+            spec['items'] = [[0.5, 0.6, 'inversion_power']]
+        elif offset == KEY_ROOM:
+            spec['hidden_items' if hidden else 'items'] = [[0.2 + 0.6 * self.random(room_id, 1), 0.65, 'key']]
+        elif offset == SWITCH_ROOM:
+            spec['hidden_switches' if hidden else 'switches'] = [[0.3 + 0.4 * self.random(room_id, 1), 0.65]]
+        elif room_id >= BLOCK_SIZE and self.random(room_id, 2) < BONUS_KEY_CHANCE:
+            spec['hidden_items'] = [[0.2 + 0.6 * self.random(room_id, 1), 0.65, 'key']]
+        return spec
+
+def room_count(value):
+    # Type argparse de --rooms : refuse une boucle trop courte pour contenir un bloc
+    count = int(value)
+    if count < BLOCK_SIZE:
+        raise argparse.ArgumentTypeError(f"une boucle générée compte au moins {BLOCK_SIZE} salles")
+    return count
+
+def add_level_arguments(parser):
+    parser.add_argument('--rooms', type=room_count, help="joue sur une boucle générée de ROOMS salles")
+    parser.add_argument('--seed', type=int, default=0, help="graine de la boucle générée")
+
+def load_level(rooms=None, seed=0):
+    # rooms remplace le niveau du fichier par une boucle générée de rooms salles
+    if rooms is not None:
+        return GeneratedLevel(rooms, seed)
+    return LevelFile()
@@ -7,11 +7,17 @@
 
 import pygame
 from constants import *
+from profiler import profiled
+from assets import asset_cache
+from entities import Inventory
+from atlas import sprite_atlas
 
 class Player:
     def __init__(self, x, y):
         self.x = x
         self.y = y
+        self.prev_x = x
+        self.prev_y = y
         self.width = PLAYER_WIDTH
         self.height = PLAYER_HEIGHT
         self.rect = pygame.Rect(x, y, self.width, self.height)
@@ -20,7 +26,7 @@ class Player:
         self.is_jumping = False
         self.gravity = 0.5
         self.jump_power = -12
-        self.inventory = []
+        self.inventory = Inventory()
         self.has_inversion_power = False
         
         self.facing_right = True
@@ -30,11 +36,15 @@ class Player:
         self.animation_timer = 0
         self.TOTAL_FRAMES = 11
         self.JUMP_FRAME = 0
+        # Images de la marche où un pied touche le sol (bruit de pas)
+        self.STEP_FRAMES = (3, 8)
         
         try:
-            walk_sheet = pygame.image.load('assets/image/walk_animation.png').convert_alpha()
+            walk_sheet = asset_cache.get_image('assets/image/walk_animation.png', convert='alpha')
             self.walk_frames = self.load_animation(walk_sheet)
             self.walk_frames_left = [pygame.transform.flip(frame, True, False) for frame in self.walk_frames]
+            self.build_silhouettes()
+            self.pack_frames()
             
             self.idle_frame = self.walk_frames[self.JUMP_FRAME]
             self.idle_frame_left = self.walk_frames_left[self.JUMP_FRAME]
@@ -43,6 +53,21 @@ class Player:
             print(f"Erreur lors du chargement des animations: {e}")
             self.create_fallback_surfaces()
 
+    def reset(self, x, y):
+        self.x = x
+        self.y = y
+        self.prev_x = x
+        self.prev_y = y
+        self.rect.topleft = (x, y)
+        self.velocity_y = 0
+        self.is_jumping = False
+        self.inventory.clear()
+        self.has_inversion_power = False
+        self.facing_right = True
+        self.is_moving = False
+        self.current_frame = 0
+        self.animation_timer = 0
+
     def load_animation(self, sheet):
         frames = []
         frame_width = sheet.get_width() // self.TOTAL_FRAMES
@@ -65,16 +90,36 @@ class Player:
         pygame.draw.rect(self.idle_frame, WHITE, (0, 0, self.width, self.height))
         self.walk_frames = [self.idle_frame] * self.TOTAL_FRAMES
         self.walk_frames_left = [self.idle_frame] * self.TOTAL_FRAMES
-        
-    def update(self, keys):
-        old_x = self.x
+        self.build_silhouettes()
+
+    def build_silhouettes(self):
+        # Silhouettes noires pré-calculées pour le mode inversé
+        self.silhouette_frames = [self.create_silhouette(frame) for frame in self.walk_frames]
+        self.silhouette_frames_left = [self.create_silhouette(frame) for frame in self.walk_frames_left]
+
+    def create_silhouette(self, frame):
+        mask = pygame.mask.from_surface(frame, 0)
+        return mask.to_surface(setcolor=BLACK, unsetcolor=(0, 0, 0, 0))
+
+    def pack_frames(self):
+        # Toutes les images du joueur rangées dans l'atlas, au format de l'écran
+        for name in ('walk_frames', 'walk_frames_left', 'silhouette_frames', 'silhouette_frames_left'):
+            frames = getattr(self, name)
+            setattr(self, name, [sprite_atlas.add(f'player.{name}.{index}', frame) for index, frame in enumerate(frames)])
+        
+    @profiled
+    def update(self, keys, dt=SIMULATION_STEP):
+        # Constantes exprimées par pas de simulation à 60 Hz
+        step = dt * SIMULATION_RATE
+        self.prev_x = self.x
+        self.prev_y = self.y
         
         if keys[pygame.K_LEFT]:
-            self.x -= self.speed
+            self.x -= self.speed * step
             self.facing_right = False
             self.is_moving = True
         elif keys[pygame.K_RIGHT]:
-            self.x += self.speed
+            self.x += self.speed * step
             self.facing_right = True
             self.is_moving = True
         else:
@@ -85,11 +130,11 @@ class Player:
             self.is_jumping = True
             self.current_frame = self.JUMP_FRAME
             
-        self.velocity_y += self.gravity
-        self.y += self.velocity_y
+        self.velocity_y += self.gravity * step
+        self.y += self.velocity_y * step
         
-        if self.y > SCREEN_HEIGHT - self.height - 250:
-            self.y = SCREEN_HEIGHT - self.height - 250
+        if self.y > SCREEN_HEIGHT - self.height - GROUND_OFFSET:
+            self.y = SCREEN_HEIGHT - self.height - GROUND_OFFSET
             self.velocity_y = 0
             self.is_jumping = False
             
@@ -102,41 +147,40 @@ class Player:
         
         if not self.is_jumping:
             if self.is_moving:
-                self.animation_timer += self.animation_speed
+                self.animation_timer += self.animation_speed * step
                 if self.animation_timer >= 1:
                     self.animation_timer = 0
                     self.current_frame = (self.current_frame + 1) % self.TOTAL_FRAMES
             else:
                 self.current_frame = 0
         
-    def draw(self, screen):
-        frames = self.walk_frames_left if not self.facing_right else self.walk_frames
-        frame_to_use = self.JUMP_FRAME if self.is_jumping else self.current_frame
-        screen.blit(frames[frame_to_use], self.rect)
+    def snap(self):
+        # Pas d'interpolation après une téléportation
+        self.prev_x = self.x
+        self.prev_y = self.y
+        
+    def draw_position(self, alpha):
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+        return (round(x), round(y))
         
-    def draw_inverted(self, screen):
+    @profiled
+    def draw(self, screen, alpha=1.0):
         frames = self.walk_frames_left if not self.facing_right else self.walk_frames
         frame_to_use = self.JUMP_FRAME if self.is_jumping else self.current_frame
-        current_frame = frames[frame_to_use]
+        return screen.blit(frames[frame_to_use], self.draw_position(alpha))
         
-        inverted_frame = pygame.Surface(current_frame.get_size(), pygame.SRCALPHA)
-        pixel_array = pygame.PixelArray(current_frame)
-        for x in range(current_frame.get_width()):
-            for y in range(current_frame.get_height()):
-                if current_frame.get_at((x, y))[3] > 0:
-                    inverted_frame.set_at((x, y), BLACK)
-        del pixel_array
-        
-        screen.blit(inverted_frame, self.rect)
+    @profiled
+    def draw_inverted(self, screen, alpha=1.0):
+        frames = self.silhouette_frames_left if not self.facing_right else self.silhouette_frames
+        frame_to_use = self.JUMP_FRAME if self.is_jumping else self.current_frame
+        return screen.blit(frames[frame_to_use], self.draw_position(alpha))
         
     def add_to_inventory(self, item):
-        self.inventory.append(item)
+        self.inventory.add(item)
         
     def has_item(self, item):
         return item in self.inventory
         
     def remove_from_inventory(self, item):
-        if item in self.inventory:
-            self.inventory.remove(item)
-            return True
-        return False
+        return self.inventory.remove(item)
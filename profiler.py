@@ -0,0 +1,167 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## profiler
+##
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+class StartupTimer:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.steps = []
+
+    def mark(self, label):
+        now = time.perf_counter()
+        self.steps.append((label, (now - self.last) * 1000))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        print("Temps de démarrage :")
+        for label, duration in self.steps:
+            print(f"  {label:<20}{duration:8.1f} ms")
+        print(f"  {'total':<20}{(self.last - self.start) * 1000:8.1f} ms")
+
+# Activé par Main.py --startup-report pour afficher le détail du démarrage
+startup_timer = StartupTimer()
+
+HUD_SMOOTHING = 0.1
+
+class FrameProfiler:
+    # Durées par étape de l'image pour le HUD (F3) et export au format Chrome trace
+    def __init__(self, trace_path=None):
+        self.hud_visible = False
+        self.trace_file = None
+        self.trace_events = 0
+        self.active = False
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.frame_start = self.origin
+        self.frame_spans = {}
+        self.averages = {}
+        self.frame_interval = 0
+        if trace_path:
+            self.start_trace(trace_path)
+
+    def update_active(self):
+        self.active = self.hud_visible or self.trace_file is not None
+
+    def toggle_hud(self):
+        self.hud_visible = not self.hud_visible
+        self.averages.clear()
+        self.update_active()
+
+    def start_trace(self, path):
+        # Tableau JSON écrit au fil de l'eau : lisible par chrome://tracing et Perfetto
+        self.trace_file = open(path, 'w')
+        self.trace_file.write('[\n')
+        self.update_active()
+
+    def stop_trace(self):
+        if self.trace_file:
+            with self.lock:
+                self.trace_file.write('\n]\n')
+                self.trace_file.close()
+                self.trace_file = None
+            self.update_active()
+
+    def begin_frame(self):
+        # Intervalle entre deux images, attente de la cadence comprise : base du calcul des FPS
+        now = time.perf_counter()
+        interval = (now - self.frame_start) * 1000
+        self.frame_interval += (interval - self.frame_interval) * HUD_SMOOTHING
+        self.frame_start = now
+
+    def end_frame(self):
+        if not self.active:
+            return
+        self.record('frame', self.frame_start, time.perf_counter())
+        with self.lock:
+            spans = self.frame_spans
+            self.frame_spans = {}
+        for name in spans.keys() | self.averages.keys():
+            average = self.averages.get(name, spans.get(name, 0))
+            self.averages[name] = average + (spans.get(name, 0) - average) * HUD_SMOOTHING
+
+    def record(self, name, start, end):
+        # Appelé aussi depuis les threads de décodage
+        if not self.active:
+            return
+        with self.lock:
+            self.frame_spans[name] = self.frame_spans.get(name, 0) + (end - start) * 1000
+            if self.trace_file:
+                event = {
+                    'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+                    'ts': round((start - self.origin) * 1e6, 1), 'dur': round((end - start) * 1e6, 1),
+                }
+                self.trace_file.write((',\n' if self.trace_events else '') + json.dumps(event))
+                self.trace_events += 1
+
+def profiled(function):
+    # Mesure la fonction sous son nom qualifié quand le profileur est actif
+    name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not frame_profiler.active:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            frame_profiler.record(name, start, time.perf_counter())
+    return wrapper
+
+# Main.py --trace trace.json y démarre l'enregistrement de toute la session
+frame_profiler = FrameProfiler()
+
+ALLOCATION_WARMUP = 30
+# Écart toléré sur le cumul : un float gardé une image de plus, une liste du chargeur...
+ALLOCATION_TOLERANCE = 16
+
+class AllocationCounter:
+    # Vérification de débogage : les images stables ne doivent laisser aucun bloc alloué.
+    # Désactivée avec python -O, comme les assert
+    def __init__(self, enabled=False, warmup=ALLOCATION_WARMUP, tolerance=ALLOCATION_TOLERANCE):
+        self.enabled = enabled and __debug__
+        self.warmup = warmup
+        self.tolerance = tolerance
+        self.blocks = 0
+        self.state_key = None
+        self.steady_frames = 0
+        self.growth = 0
+
+    def check(self, state):
+        # Mesure d'une fin d'image à la suivante : les rectangles et horodatages gardés
+        # jusqu'à l'image suivante s'y compensent, seule la croissance reste
+        if not self.enabled:
+            return
+        blocks = sys.getallocatedblocks()
+        allocated = blocks - self.blocks
+        self.blocks = blocks
+        # Clé construite après la mesure, elle alloue elle-même
+        state_key = state.steady_key() if hasattr(state, 'steady_key') else None
+        if state_key is None or state_key != self.state_key:
+            self.state_key = state_key
+            self.steady_frames = 0
+            self.growth = 0
+            return
+        self.steady_frames += 1
+        if self.steady_frames > self.warmup:
+            # Cumul plutôt qu'image par image : le bruit se compense, une fuite s'accumule
+            self.growth += allocated
+            assert self.growth <= self.tolerance, \
+                f"{self.growth} blocs alloués en {self.steady_frames - self.warmup} images stables {state_key}"
+
+# Activé par Main.py --check-allocations pour vérifier les allocations en jeu
+allocation_counter = AllocationCounter()
@@ -0,0 +1,46 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## renderer
+##
+
+class DirtyRectRenderer:
+    def __init__(self):
+        self.layer = None
+        self.target = None
+        self.full_redraw = True
+        # Listes réutilisées à chaque image
+        self.previous_rects = []
+        self.dirty_rects = []
+        self.present_rects = []
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def begin(self, screen, layer):
+        # Nouveau calque ou nouvel écran : on recopie tout, sinon on efface seulement l'image précédente
+        if self.full_redraw or layer is not self.layer or screen is not self.target:
+            screen.blit(layer, (0, 0))
+            self.layer = layer
+            self.target = screen
+            self.full_redraw = True
+            self.previous_rects.clear()
+        else:
+            for rect in self.dirty_rects:
+                screen.blit(layer, rect, rect)
+            self.previous_rects, self.dirty_rects = self.dirty_rects, self.previous_rects
+        self.dirty_rects.clear()
+
+    def add(self, rects):
+        self.dirty_rects.extend(rects)
+
+    def end(self):
+        # None : l'écran entier doit être présenté
+        if self.full_redraw:
+            self.full_redraw = False
+            return None
+        self.present_rects.clear()
+        self.present_rects.extend(self.previous_rects)
+        self.present_rects.extend(self.dirty_rects)
+        return self.present_rects
@@ -8,222 +8,350 @@
 import pygame
 import math
 from constants import *
+from profiler import profiled
+from assets import asset_cache
+from atlas import sprite_atlas
+from collections import OrderedDict
+from triggers import Trigger, TriggerGrid
+from inversion import invert_color
+from levels import load_level
+from entities import Item, Switch, Door, ITEM_TYPES, ITEM_KEY, ITEM_INVERSION_POWER
 
-class Room:
+ROOM_CACHE_SIZE = 5
+
+def level_position(entry):
+    # Coordonnées du niveau en fractions de l'écran
+    return (round(entry[0] * SCREEN_WIDTH), entry[1] * SCREEN_HEIGHT)
+
+def create_room(spec):
+    item_entries = [(entry, False) for entry in spec.get('items', ())]
+    item_entries += [(entry, True) for entry in spec.get('hidden_items', ())]
+    items = [Item(*level_position(entry), ITEM_TYPES[entry[2]], hidden, index)
+             for index, (entry, hidden) in enumerate(item_entries)]
+    switch_entries = [(entry, False) for entry in spec.get('switches', ())]
+    switch_entries += [(entry, True) for entry in spec.get('hidden_switches', ())]
+    switches = [Switch(*level_position(entry), hidden, index)
+                for index, (entry, hidden) in enumerate(switch_entries)]
+    special_decor = None
+    if spec.get('decor'):
+        x, y, width, height = spec['decor']
+        special_decor = pygame.Rect(x * SCREEN_WIDTH, y * SCREEN_HEIGHT,
+                                    width * SCREEN_WIDTH, height * SCREEN_HEIGHT)
+    room = Room(spec['id'], items=items, switches=switches, special_decor=special_decor)
+    for direction, target in spec.get('doors', {}).items():
+        room.doors[direction].target = target
+    return room
+
+def load_sprite(name, path, size):
     try:
-        background_image = pygame.image.load('assets/image/background.jpg')
-        background_inverted = pygame.image.load('assets/image/background_inversé.jpg')
-        key_sprite = pygame.image.load('assets/image/key.png')
-        switch_on = pygame.image.load('assets/image/switch_on.png')
-        switch_off = pygame.image.load('assets/image/switch_off.png')
-        power_sprite = pygame.image.load('assets/image/power.png')
-        button_e = pygame.image.load('assets/image/e.png')
-    except pygame.error as e:
+        return sprite_atlas.load(name, path, size)
+    except (pygame.error, FileNotFoundError) as e:
         print(f"Erreur: Impossible de charger les images: {e}")
-        background_image = None
-        background_inverted = None
-        key_sprite = None
-        switch_on = None
-        switch_off = None
-        power_sprite = None
-        button_e = None
+        return None
 
-    def __init__(self, room_id, doors=None, items=None, switches=None, hidden_items=None, hidden_switches=None, special_decor=None):
+class Room:
+    def __init__(self, room_id, doors=None, items=None, switches=None, special_decor=None):
         self.room_id = room_id
-        if Room.background_image and Room.background_inverted:
-            self.background = pygame.transform.scale(Room.background_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-            self.background_inverted = pygame.transform.scale(Room.background_inverted, (SCREEN_WIDTH, SCREEN_HEIGHT))
-            
-        if Room.key_sprite:
-            self.key_sprite = pygame.transform.scale(Room.key_sprite, (40, 40))
-        if Room.switch_on:
-            self.switch_on = pygame.transform.scale(Room.switch_on, (60, 60))
-        if Room.switch_off:
-            self.switch_off = pygame.transform.scale(Room.switch_off, (60, 60))
-        if Room.power_sprite:
-            self.power_sprite = pygame.transform.scale(Room.power_sprite, (100, 100))
-        if Room.button_e:
-            self.button_e = pygame.transform.scale(Room.button_e, (30, 30))
+        # Une image manquante laisse son attribut à None : la salle se dessine sans elle
+        try:
+            self.background = asset_cache.get_image('assets/image/background.jpg', (SCREEN_WIDTH, SCREEN_HEIGHT), 'opaque')
+            self.background_inverted = asset_cache.get_inverted('assets/image/background.jpg', (SCREEN_WIDTH, SCREEN_HEIGHT), 'opaque')
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"Erreur: Impossible de charger les images: {e}")
+            self.background = None
+            self.background_inverted = None
+        self.key_sprite = load_sprite('key', 'assets/image/key.png', (40, 40))
+        self.switch_on = load_sprite('switch_on', 'assets/image/switch_on.png', (60, 60))
+        self.switch_off = load_sprite('switch_off', 'assets/image/switch_off.png', (60, 60))
+        self.power_sprite = load_sprite('power', 'assets/image/power.png', (100, 100))
+        self.button_e = load_sprite('button_e', 'assets/image/e.png', (30, 30))
             
         self.doors = doors or {
-            'front': pygame.Rect(SCREEN_WIDTH, SCREEN_HEIGHT - DOOR_HEIGHT - 50, DOOR_WIDTH, DOOR_HEIGHT),
-            'back': pygame.Rect(-DOOR_WIDTH, SCREEN_HEIGHT - DOOR_HEIGHT - 50, DOOR_WIDTH, DOOR_HEIGHT)
+            'front': Door('front', pygame.Rect(SCREEN_WIDTH, SCREEN_HEIGHT - DOOR_HEIGHT - DOOR_FLOOR_OFFSET, DOOR_WIDTH, DOOR_HEIGHT)),
+            'back': Door('back', pygame.Rect(-DOOR_WIDTH, SCREEN_HEIGHT - DOOR_HEIGHT - DOOR_FLOOR_OFFSET, DOOR_WIDTH, DOOR_HEIGHT))
         }
-        self.items = items or {}
-        self.hidden_items = hidden_items or {}
-        self.switches = switches or {}
-        self.hidden_switches = hidden_switches or {}
-        self.next_room = {'front': None, 'back': None}
+        # Objets et interrupteurs, visibles ou cachés, dans l'ordre du niveau
+        self.items = items or []
+        self.switches = switches or []
         self.special_decor = special_decor
+        self.static_layers = {}
+        self.triggers = TriggerGrid()
+        self.reset()
+        
+    def reset(self):
+        # État de jeu modifiable, restauré depuis la description initiale de la salle
+        for item in self.items:
+            item.collected = False
+        for switch in self.switches:
+            switch.activated = False
         self.animation_time = 0
         self.switch_in_range = None
         self.key_in_range = None
+        self.invalidate_static_layers()
+        self.build_triggers()
         
-    def draw(self, screen, is_inverted=False, player_has_key=False):
-        self.animation_time += 0.05
-        float_offset = math.sin(self.animation_time) * 10
-
-        if hasattr(self, 'background') and hasattr(self, 'background_inverted'):
+    def restore(self, state):
+        # Réapplique l'état sauvegardé d'une salle libérée puis recréée
+        for index in state['items']:
+            self.items[index].collected = True
+        for index in state['switches']:
+            self.switches[index].activated = True
+        self.invalidate_static_layers()
+        self.build_triggers()
+        
+    def build_triggers(self):
+        # Volumes de déclenchement calculés une fois, pas à chaque image
+        self.triggers.clear()
+        for direction, door in self.doors.items():
+            extended_door = pygame.Rect(
+                door.rect.x - 50 if direction == 'back' else door.rect.x, 
+                door.rect.y, 
+                door.rect.width + 100,
+                door.rect.height
+            )
+            self.triggers.add(Trigger('door', extended_door, door))
+        for item in self.items:
+            if not item.collected:
+                size = 40 if item.kind == ITEM_KEY else 100
+                self.triggers.add(Trigger('item', pygame.Rect(item.x - 20, item.y - ITEM_OFFSET, size, size), item))
+        for switch in self.switches:
+            if not switch.activated:
+                self.triggers.add(Trigger('switch', pygame.Rect(switch.x - 30, switch.y - SWITCH_OFFSET, 60, 60), switch))
+        
+    def update(self, dt):
+        self.animation_time += 0.05 * dt * SIMULATION_RATE
+        
+    @profiled
+    def get_static_layer(self, is_inverted):
+        # Fond, portes, décor et interrupteurs composés une seule fois par mode
+        layer = self.static_layers.get(is_inverted)
+        if layer is None:
+            layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+            self.draw_static(layer, is_inverted)
+            self.static_layers[is_inverted] = layer
+        return layer
+        
+    def invalidate_static_layers(self):
+        self.static_layers.clear()
+        
+    def draw_static(self, screen, is_inverted=False):
+        if self.background is not None and self.background_inverted is not None:
             if not is_inverted:
                 screen.blit(self.background, (0, 0))
             else:
                 screen.blit(self.background_inverted, (0, 0))
         else:
-            screen.fill(BLACK if not is_inverted else WHITE)
+            screen.fill(invert_color(BLACK) if is_inverted else BLACK)
             
+        door_color = invert_color(WHITE) if is_inverted else WHITE
         for door in self.doors.values():
-            pygame.draw.rect(screen, WHITE if not is_inverted else BLACK, door)
+            pygame.draw.rect(screen, door_color, door.rect)
             
         if self.special_decor:
-            if not is_inverted:
-                pygame.draw.rect(screen, GRAY, self.special_decor)
-            else:
-                pygame.draw.rect(screen, WHITE, self.special_decor)
-            
-        if not is_inverted:
-            for pos, item_type in self.items.items():
-                if item_type == 'key' and hasattr(self, 'key_sprite'):
-                    screen.blit(self.key_sprite, 
-                              (pos[0] - 20, pos[1] - 150 + float_offset))
-                    if self.key_in_range == pos:
-                        screen.blit(self.button_e, (pos[0] - 15, pos[1] - 180))
-                elif item_type == 'inversion_power' and hasattr(self, 'power_sprite'):
-                    screen.blit(self.power_sprite, 
-                              (pos[0] - 50, pos[1] - 200 + float_offset))
-            
-            for pos, is_activated in self.switches.items():
-                sprite = self.switch_on if is_activated else self.switch_off
-                if sprite:
-                    screen.blit(sprite, (pos[0] - 30, pos[1] - 170))
-                    if self.switch_in_range == pos and player_has_key and not is_activated and hasattr(self, 'button_e'):
-                        screen.blit(self.button_e, (pos[0] - 15, pos[1] - 200))
-        else:
-            for pos, item_type in self.hidden_items.items():
-                if item_type == 'key' and hasattr(self, 'key_sprite'):
-                    screen.blit(self.key_sprite, 
-                              (pos[0] - 20, pos[1] - 150 + float_offset))
-                    if self.key_in_range == pos:
-                        screen.blit(self.button_e, (pos[0] - 15, pos[1] - 180))
+            # Le décor reste blanc dans le monde inversé, ce n'est pas le négatif du gris
+            pygame.draw.rect(screen, WHITE if is_inverted else GRAY, self.special_decor)
+                
+        for switch in self.switches:
+            if switch.hidden != is_inverted:
+                continue
+            sprite = self.switch_on if switch.activated else self.switch_off
+            if sprite is not None:
+                screen.blit(sprite, (switch.x - 30, switch.y - SWITCH_OFFSET))
+                
+    @profiled
+    def draw_dynamic(self, screen, is_inverted=False, player_has_key=False, dirty_rects=None):
+        # Ajoute les rectangles modifiés à dirty_rects (liste du moteur de rendu partiel) et la renvoie
+        float_offset = math.sin(self.animation_time) * 10
+        if dirty_rects is None:
+            dirty_rects = []
+        
+        for item in self.items:
+            if item.collected or item.hidden != is_inverted:
+                continue
+            if item.kind == ITEM_KEY and self.key_sprite is not None:
+                dirty_rects.append(screen.blit(self.key_sprite, 
+                          (item.x - 20, item.y - ITEM_OFFSET + float_offset)))
+                if self.key_in_range is item and self.button_e is not None:
+                    dirty_rects.append(screen.blit(self.button_e, (item.x - 15, item.y - ITEM_PROMPT_OFFSET)))
+            elif item.kind == ITEM_INVERSION_POWER and not is_inverted and self.power_sprite is not None:
+                dirty_rects.append(screen.blit(self.power_sprite, 
+                          (item.x - 50, item.y - POWER_OFFSET + float_offset)))
             
-            for pos, is_activated in self.hidden_switches.items():
-                sprite = self.switch_on if is_activated else self.switch_off
-                if sprite:
-                    screen.blit(sprite, (pos[0] - 30, pos[1] - 170))
-                    if self.switch_in_range == pos and player_has_key and not is_activated and hasattr(self, 'button_e'):
-                        screen.blit(self.button_e, (pos[0] - 15, pos[1] - 200))
+        switch = self.switch_in_range
+        if switch and switch.hidden == is_inverted and player_has_key and not switch.activated and self.button_e is not None:
+            dirty_rects.append(screen.blit(self.button_e, (switch.x - 15, switch.y - SWITCH_PROMPT_OFFSET)))
+        return dirty_rects
 
 class RoomManager:
-    def __init__(self):
-        self.rooms = {}
+    def __init__(self, level=None):
+        self.level = level or load_level()
+        # Salles instanciées à la demande, les moins récemment visitées sont libérées
+        self.rooms = OrderedDict()
+        # État modifié des salles (objets ramassés, interrupteurs activés), conservé après libération
+        self.room_states = {}
         self.current_room = None
-        self.setup_rooms()
         self.game_completed = False
+        self.elapsed_time = 0
         self.last_teleport_time = 0
         self.teleport_cooldown = 500
         self.player = None
+        self.active_triggers = set()
+        self.touching_triggers = set()
+        self.left_triggers = set()
+        self.entered_triggers = set()
+        self.staying_triggers = []
+        self.enter_room(self.level.start)
+        self.remaining_switches = self.count_remaining_switches()
         
-    def setup_rooms(self):
-        special_decor = pygame.Rect(SCREEN_WIDTH//2 - SCREEN_WIDTH//10, 
-                                  SCREEN_HEIGHT//2 - SCREEN_HEIGHT//10, 
-                                  SCREEN_WIDTH//5, SCREEN_HEIGHT//5)
-        
-        key_y = SCREEN_HEIGHT * 0.65
-        switch_y = SCREEN_HEIGHT * 0.65
-        power_y = SCREEN_HEIGHT * 0.6
-        
-        self.rooms = {
-            0: Room(0),
-            1: Room(1),
-            2: Room(2),
-            3: Room(3, hidden_switches={(SCREEN_WIDTH//2, switch_y): False}),
-            4: Room(4, items={(SCREEN_WIDTH//4, key_y): 'key'}),
-            5: Room(5, switches={(SCREEN_WIDTH//2, switch_y): False}),
-            6: Room(6, items={(SCREEN_WIDTH//2, power_y): 'inversion_power'}),
-            7: Room(7, items={(3*SCREEN_WIDTH//4, key_y): 'key'}),
-            8: Room(8, switches={(SCREEN_WIDTH//3, switch_y): False}),
-            9: Room(9, hidden_items={(3*SCREEN_WIDTH//4, key_y): 'key'}),
-        }
+    def get_room(self, room_id):
+        room = self.rooms.get(room_id)
+        if room is not None:
+            self.rooms.move_to_end(room_id)
+            return room
+        room = create_room(self.level.room_spec(room_id))
+        state = self.room_states.get(room_id)
+        if state:
+            room.restore(state)
+        self.rooms[room_id] = room
+        return room
         
-        self.rooms[0].next_room = {'front': 1, 'back': 9}
-        self.rooms[1].next_room = {'front': 2, 'back': 0}
-        self.rooms[2].next_room = {'front': 3, 'back': 1}
-        self.rooms[3].next_room = {'front': 4, 'back': 2}
-        self.rooms[4].next_room = {'front': 5, 'back': 3}
-        self.rooms[5].next_room = {'front': 6, 'back': 4}
-        self.rooms[6].next_room = {'front': 7, 'back': 5}
-        self.rooms[7].next_room = {'front': 8, 'back': 6}
-        self.rooms[8].next_room = {'front': 9, 'back': 7}
-        self.rooms[9].next_room = {'front': 0, 'back': 8}
-        
-        self.current_room = self.rooms[0]
+    def enter_room(self, room_id):
+        # La salle courante et ses voisines restent prêtes, le reste est libéré au-delà du cache
+        self.current_room = self.get_room(room_id)
+        neighbours = [door.target for door in self.current_room.doors.values() if door.target is not None]
+        for next_id in neighbours:
+            self.get_room(next_id)
+        self.rooms.move_to_end(room_id)
+        while len(self.rooms) > ROOM_CACHE_SIZE:
+            oldest = next(iter(self.rooms))
+            if oldest == room_id or oldest in neighbours:
+                break
+            self.rooms.popitem(last=False)
+        return self.current_room
+        
+    def room_state(self, room_id):
+        # Indices des objets ramassés et des interrupteurs activés dans les listes de la salle
+        return self.room_states.setdefault(room_id, {'items': set(), 'switches': set()})
+        
+    def reset(self):
+        self.room_states.clear()
+        for room in self.rooms.values():
+            room.reset()
+        self.enter_room(self.level.start)
+        self.game_completed = False
+        self.elapsed_time = 0
+        self.last_teleport_time = 0
+        self.active_triggers.clear()
+        self.remaining_switches = self.count_remaining_switches()
+
+    def count_remaining_switches(self):
+        # Total issu du niveau, sans parcourir les salles
+        flipped = sum(len(state['switches']) for state in self.room_states.values())
+        return self.level.switch_total - flipped
 
     def check_all_switches_activated(self):
-        for room in self.rooms.values():
-            for is_activated in room.switches.values():
-                if not is_activated:
-                    return False
-            for is_activated in room.hidden_switches.values():
-                if not is_activated:
-                    return False
-        return True
+        # Compteur tenu à jour à chaque interrupteur activé
+        return self.remaining_switches == 0
+        
+    @profiled
+    def update(self, player, keys, dt=SIMULATION_STEP):
+        # Temps simulé en millisecondes, indépendant de la cadence de rendu
+        self.elapsed_time += dt * 1000
+        self.current_room.update(dt)
         
-    def update(self, player):
-        current_time = pygame.time.get_ticks()
-        keys = pygame.key.get_pressed()
+        # Entrées et sorties des volumes de la salle au lieu de tout tester à chaque image
+        # Ensembles et liste réutilisés d'une image à l'autre : aucune allocation en régime stable
+        touching = self.current_room.triggers.query(player.rect, self.touching_triggers)
+        left = self.left_triggers
+        left.clear()
+        left |= self.active_triggers
+        left -= touching
+        entered = self.entered_triggers
+        entered.clear()
+        entered |= touching
+        entered -= self.active_triggers
+        self.touching_triggers = self.active_triggers
+        self.active_triggers = touching
+        for trigger in left:
+            self.on_trigger_leave(trigger)
+        for trigger in entered:
+            self.on_trigger_enter(trigger, player)
         
+        staying = self.staying_triggers
+        staying.clear()
+        staying.extend(self.active_triggers)
+        for trigger in staying:
+            if self.on_trigger_stay(trigger, player, keys):
+                break
+                
+    def on_trigger_enter(self, trigger, player):
+        room = self.current_room
+        if trigger.kind == 'item':
+            if trigger.key.kind == ITEM_KEY:
+                room.key_in_range = trigger.key
+            elif trigger.key.kind == ITEM_INVERSION_POWER:
+                player.has_inversion_power = True
+                self.remove_trigger(trigger)
+        elif trigger.kind == 'switch':
+            room.switch_in_range = trigger.key
+            
+    def on_trigger_leave(self, trigger):
+        room = self.current_room
+        if trigger.kind == 'item' and room.key_in_range is trigger.key:
+            room.key_in_range = None
+        elif trigger.kind == 'switch' and room.switch_in_range is trigger.key:
+            room.switch_in_range = None
+            
+    def on_trigger_stay(self, trigger, player, keys):
+        # Renvoie True quand la salle a changé
+        room = self.current_room
+        if trigger.kind == 'door':
+            if self.elapsed_time - self.last_teleport_time > self.teleport_cooldown:
+                if self.check_all_switches_activated():
+                    self.game_completed = True
+                else:
+                    return self.teleport(trigger.key.direction, player)
+        elif trigger.kind == 'item':
+            if keys[pygame.K_e]:
+                player.add_to_inventory(trigger.key.kind)
+                room.key_in_range = None
+                self.remove_trigger(trigger)
+        elif trigger.kind == 'switch':
+            if keys[pygame.K_e] and player.remove_from_inventory(ITEM_KEY):
+                switch = trigger.key
+                switch.activated = True
+                self.room_state(room.room_id)['switches'].add(switch.index)
+                room.switch_in_range = None
+                room.invalidate_static_layers()
+                self.remaining_switches -= 1
+                self.remove_trigger(trigger)
+        return False
+        
+    def remove_trigger(self, trigger):
+        room = self.current_room
+        if trigger.kind == 'item':
+            trigger.key.collected = True
+            self.room_state(room.room_id)['items'].add(trigger.key.index)
+        room.triggers.remove(trigger)
+        self.active_triggers.discard(trigger)
+        
+    def teleport(self, direction, player):
+        next_room_id = self.current_room.doors[direction].target
+        if next_room_id is None:
+            return False
+        self.current_room.invalidate_static_layers()
         self.current_room.switch_in_range = None
         self.current_room.key_in_range = None
+        self.enter_room(next_room_id)
+        if direction == 'front':
+            player.x = self.current_room.doors['back'].rect.right
+        else:
+            player.x = self.current_room.doors['front'].rect.left - player.width 
+        player.snap()
+        self.last_teleport_time = self.elapsed_time
+        self.active_triggers.clear()
+        return True
         
-        for direction, door in self.current_room.doors.items():
-            extended_door = pygame.Rect(
-                door.x - 50 if direction == 'back' else door.x, 
-                door.y, 
-                door.width + 100,
-                door.height
-            )
-            
-            if player.rect.colliderect(extended_door):
-                if current_time - self.last_teleport_time > self.teleport_cooldown:
-                    if self.check_all_switches_activated():
-                        self.game_completed = True
-                    else:
-                        next_room_id = self.current_room.next_room[direction]
-                        if next_room_id is not None:
-                            self.current_room = self.rooms[next_room_id]
-                            if direction == 'front':
-                                player.x = self.current_room.doors['back'].right
-                            else:
-                                player.x = self.current_room.doors['front'].left - player.width 
-                            self.last_teleport_time = current_time
-        
-        for obj_dict, offset_y in [(self.current_room.items, -150), (self.current_room.hidden_items, -150)]:
-            for pos, item_type in list(obj_dict.items()):
-                item_rect = pygame.Rect(
-                    pos[0]-20, 
-                    pos[1]+offset_y,
-                    40 if item_type == 'key' else 100,
-                    40 if item_type == 'key' else 100
-                )
-                if player.rect.colliderect(item_rect):
-                    if item_type == 'key':
-                        self.current_room.key_in_range = pos
-                        if keys[pygame.K_e]:
-                            player.add_to_inventory(item_type)
-                            obj_dict.pop(pos)
-                    elif item_type == 'inversion_power':
-                        player.has_inversion_power = True
-                        obj_dict.pop(pos)
-    
-        for switches in [self.current_room.switches, self.current_room.hidden_switches]:
-            for pos, is_activated in switches.items():
-                if not is_activated:
-                    switch_rect = pygame.Rect(pos[0]-30, pos[1]-170, 60, 60)
-                    if player.rect.colliderect(switch_rect):
-                        self.current_room.switch_in_range = pos
-                        if keys[pygame.K_e] and 'key' in player.inventory:
-                            switches[pos] = True
-                            player.inventory.remove('key')
-                
-    def draw(self, screen, is_inverted=False):
-        has_key = 'key' in self.player.inventory if self.player else False
-        self.current_room.draw(screen, is_inverted, has_key)
+    def draw_dynamic(self, screen, is_inverted=False, dirty_rects=None):
+        has_key = self.player.has_item(ITEM_KEY) if self.player else False
+        return self.current_room.draw_dynamic(screen, is_inverted, has_key, dirty_rects)
@@ -0,0 +1,24 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## settings
+##
+
+import json
+
+SETTINGS_PATH = 'settings.json'
+
+def load_settings(path=SETTINGS_PATH):
+    try:
+        with open(path) as settings_file:
+            return json.load(settings_file)
+    except (OSError, ValueError):
+        return {}
+
+def save_settings(settings, path=SETTINGS_PATH):
+    try:
+        with open(path, 'w') as settings_file:
+            json.dump(settings, settings_file, indent=4)
+    except OSError as e:
+        print(f"Erreur: Impossible d'enregistrer les paramètres: {e}")
@@ -0,0 +1,43 @@
+##
+## EPITECH PROJECT, 2025
+## Loop-The-Game
+## File description:
+## triggers
+##
+
+TRIGGER_CELL_SIZE = 128
+
+class Trigger:
+    def __init__(self, kind, rect, key):
+        # kind : 'door', 'item' ou 'switch' ; key : porte, objet ou interrupteur concerné
+        self.kind = kind
+        self.rect = rect
+        self.key = key
+
+class TriggerGrid:
+    def __init__(self, cell_size=TRIGGER_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def cell_range(self, rect):
+        # Index en colonnes : les salles s'étendent en largeur
+        return range(rect.left // self.cell_size, (rect.right - 1) // self.cell_size + 1)
+
+    def add(self, trigger):
+        for cell in self.cell_range(trigger.rect):
+            self.cells.setdefault(cell, []).append(trigger)
+
+    def remove(self, trigger):
+        for cell in self.cell_range(trigger.rect):
+            self.cells[cell].remove(trigger)
+
+    def clear(self):
+        self.cells.clear()
+
+    def query(self, rect, found):
+        found.clear()
+        for cell in self.cell_range(rect):
+            for trigger in self.cells.get(cell, ()):
+                if trigger.rect.colliderect(rect):
+                    found.add(trigger)
+        return found